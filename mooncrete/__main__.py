@@ -11,14 +11,69 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program. If not, see http://www.gnu.org/licenses/.
 
-import view
-import model
-import controller
-import eventmanager
+import argparse
+import trace
 
-def main():
-    evman = eventmanager.EventManager()
+
+# {--trace-level choice: trace level}
+TRACE_LEVELS = {
+    'debug': trace.DEBUG,
+    'info': trace.INFO,
+    'warning': trace.WARNING,
+    'error': trace.ERROR,
+    }
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(prog='mooncrete')
+    parser.add_argument('--headless', action='store_true',
+        help='step the game without a display, as fast as it goes')
+    parser.add_argument('--steps', type=int, default=10000,
+        help='model steps to run headless')
+    parser.add_argument('--seed', type=int, default=None,
+        help='random seed for a headless run')
+    parser.add_argument('--script', default=None,
+        help='file of moves to play in a headless run')
+    parser.add_argument('--no-bot', dest='bots', action='store_false',
+        help='do not let the bots play a headless run')
+    parser.add_argument('--swarm', action='store_true',
+        help='play a headless run in swarm stress mode')
+    parser.add_argument('--queued', action='store_true',
+        help='queue posted events and handle them each tick')
+    parser.add_argument('--stats', default=None,
+        help='write event counts and handler timings to this JSON file')
+    parser.add_argument('--trace-level', choices=sorted(TRACE_LEVELS),
+        default='info',
+        help='the lowest level of messages traced, debug traces posted events')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    options = parse_arguments(argv)
+    trace.LEVEL = TRACE_LEVELS[options.trace_level]
+    if options.headless:
+        # the headless driver does not need pygame
+        import headless
+        headless.main(options.steps, options.seed, options.script,
+                      options.bots, options.swarm, options.queued,
+                      options.stats)
+        return
+
+    import view
+    import model
+    import controller
+    import scheduler
+    import eventmanager
+    evman = eventmanager.EventManager(queued=options.queued)
+    if options.stats:
+        evman.EnableInstrumentation(options.stats)
     engine = model.MoonModel(evman)
     graphics = view.MoonView(evman, engine)
     kbinput = controller.MoonController(evman, engine, graphics)
+    # let the scheduler pace frames, sleeping until input while idle
+    engine.scheduler = scheduler.FrameScheduler(
+        view.FPS, wait=graphics.wait_for_input)
+    graphics.fps = 0
     engine.run()
+
+if __name__ == '__main__':
+    main()
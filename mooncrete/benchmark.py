@@ -0,0 +1,602 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+# Micro benchmarks for the game engine hot paths.
+#
+# None of these need a display. Run them all with:
+#
+#   python -m mooncrete.benchmark
+#
+# or a single one by name:
+#
+#   python -m mooncrete.benchmark dispatch
+
+
+import os
+import sys
+import random
+import itertools
+import timeit
+import trace
+import model
+import bot
+import puzzle
+import helper
+import spatial
+import gameObjects
+import projectiles
+import moonbase
+from eventmanager import *
+
+
+# the event classes the view used to test for, in the order it tested them.
+# used to simulate the isinstance chains of broadcast listeners.
+VIEW_EVENT_CHAIN = (
+    TickEvent,
+    InitializeEvent,
+    ResetGameEvent,
+    StateEvent,
+    LunarLandscapeClearedEvent,
+    LunarLandSpawnEvent,
+    MooncreteSpawnEvent,
+    MooncreteDestroyEvent,
+    BuildingSpawnEvent,
+    BuildingDestroyEvent,
+    TurretSpawnedEvent,
+    TurretDestroyEvent,
+    RadarSpawnedEvent,
+    RadarDestroyEvent,
+    AsteroidSpawnedEvent,
+    AsteroidMovedEvent,
+    AsteroidDestroyEvent,
+    MissileSpawnedEvent,
+    MissileMovedEvent,
+    MissileDestroyEvent,
+    ExplosionSpawnEvent,
+    ExplosionGrowEvent,
+    ExplosionDestroyEvent,
+    QuitEvent,
+    )
+
+MODEL_EVENT_CHAIN = (TickEvent, StepGameEvent, QuitEvent)
+
+CONTROLLER_EVENT_CHAIN = (TickEvent, StateEvent)
+
+
+class ChainListener(object):
+    """
+    A listener that tests each event against a chain of classes,
+    the way every listener did before type indexed dispatch.
+
+    """
+
+    def __init__(self, event_chain):
+        self.event_chain = event_chain
+        self.handled = 0
+
+    def notify(self, event):
+        for event_class in self.event_chain:
+            if isinstance(event, event_class):
+                self.handled += 1
+                return
+
+    def handle(self, event):
+        self.handled += 1
+
+
+def _arcade_burst(count):
+    """
+    A list of the high frequency events posted by one arcade step.
+
+    """
+
+    events = []
+    for n in xrange(count):
+        events.append(AsteroidMovedEvent(None))
+        events.append(ExplosionGrowEvent(None))
+    events.append(TickEvent())
+    return events
+
+
+def bench_dispatch(repeat=5, burst=50, number=200):
+    """
+    Compare the cost per posted event of broadcast listeners with
+    isinstance chains against type indexed handlers, and of type indexed
+    handlers with instrumentation on. The instrumented event counts are
+    reported at the end.
+
+    """
+
+    chains = (MODEL_EVENT_CHAIN, VIEW_EVENT_CHAIN, CONTROLLER_EVENT_CHAIN)
+    events = _arcade_burst(burst)
+
+    broadcast = EventManager()
+    for chain in chains:
+        broadcast.RegisterListener(ChainListener(chain))
+
+    indexed = EventManager()
+    instrumented = EventManager()
+    instrumented.EnableInstrumentation()
+    for evman in (indexed, instrumented):
+        for chain in chains:
+            listener = ChainListener(chain)
+            for event_class in chain:
+                evman.RegisterHandler(event_class, listener.handle)
+
+    results = []
+    for name, evman in (('broadcast', broadcast), ('indexed', indexed),
+                        ('counted', instrumented)):
+        post = evman.Post
+        def run():
+            for event in events:
+                post(event)
+        best = min(timeit.repeat(run, repeat=repeat, number=number))
+        per_event = best / (number * len(events))
+        results.append((name, per_event))
+        print('dispatch %-10s %8.3f usec/event' % (name, per_event * 1e6))
+    report = instrumented.stats.report()
+    print('dispatch counted %d posted, %d handled events' % (
+        report['posted'], report['handled']))
+    return results
+
+
+def _walk_collides(board, shape, offset):
+    """
+    The cell by cell collision test the model used before the masks.
+
+    """
+
+    x, y = offset
+    for cy, row in enumerate(shape):
+        for cx, cell in enumerate(row):
+            if cell:
+                try:
+                    if board.grid[cy + y][cx + x]:
+                        return True
+                except IndexError:
+                    return True
+    return False
+
+
+def bench_collision(repeat=5, number=20):
+    """
+    Compare the cost of testing every placement of every shape rotation
+    on a half filled board, walking cells against masks.
+
+    """
+
+    board = puzzle.make_board(model.PUZZLE_WIDTH, model.PUZZLE_HEIGHT)
+    rand = random.Random(0)
+    for y in xrange(board.height // 2, board.height):
+        for x in xrange(board.width):
+            if rand.random() < 0.6:
+                board.merge([[model.BLOCK_WATER_BARREL]], (x, y))
+    placements = []
+    for shape in model.PIECE_CATALOGUE:
+        for turn, mask in zip(shape.rotations, shape.masks):
+            for y in xrange(board.height):
+                for x in xrange(board.width - len(turn[0]) + 1):
+                    placements.append((turn, (x, y), mask))
+
+    def walk():
+        for shape, offset, mask in placements:
+            _walk_collides(board, shape, offset)
+
+    def masks():
+        collides = board.collides
+        for shape, offset, mask in placements:
+            collides(shape, offset, mask)
+
+    results = []
+    for name, run in (('walk', walk), ('masks', masks)):
+        best = min(timeit.repeat(run, repeat=repeat, number=number))
+        per_test = best / (number * len(placements))
+        results.append((name, per_test))
+        print('collision %-10s %8.3f usec/test' % (name, per_test * 1e6))
+    return results
+
+
+def _scan_explosions(asteroids, explosions):
+    """
+    The explosion hit test the model used before the grid, every explosion
+    against every asteroid.
+
+    """
+
+    hits = 0
+    for explosion in explosions:
+        for asteroid in asteroids:
+            if asteroid.y > model.ASTEROID_SAFE_ZONE:
+                dist = helper.distance(* asteroid.position + explosion.position)
+                if (dist < explosion.radius * 4):
+                    hits += 1
+    return hits
+
+
+def _grid_explosions(asteroids, explosions):
+    """
+    The explosion hit test the model does, through a spatial grid.
+
+    """
+
+    grid = spatial.SpatialGrid(model.ARCADE_GRID_CELL)
+    for index, asteroid in enumerate(asteroids):
+        x, y = asteroid.position
+        if y > model.ASTEROID_SAFE_ZONE:
+            grid.insert(index, x, y)
+    hits = 0
+    for explosion in explosions:
+        reach = explosion.radius * 4
+        reach_squared = reach * reach
+        u, v = explosion.position
+        for index in grid.near(u, v, reach):
+            x, y = asteroids[index].position
+            if (x - u) ** 2 + (y - v) ** 2 < reach_squared:
+                hits += 1
+    return hits
+
+
+def bench_explosions(counts=((10, 20), (50, 100), (200, 1000)), repeat=5, number=20):
+    """
+    Compare the cost of one arcade step of explosion hit tests, for
+    (explosions, asteroids) counts, scanning against the grid.
+
+    """
+
+    rand = random.Random(0)
+    results = []
+    for explosion_count, asteroid_count in counts:
+        asteroids = [gameObjects.Asteroid(
+            (rand.randint(0, model.ARCADE_WIDTH), rand.randint(0, model.ARCADE_HEIGHT)),
+            (rand.randint(0, model.ARCADE_WIDTH), model.ARCADE_HEIGHT))
+            for n in xrange(asteroid_count)]
+        explosions = []
+        for n in xrange(explosion_count):
+            explosion = gameObjects.Explosion(
+                (rand.randint(0, model.ARCADE_WIDTH), rand.randint(0, model.ARCADE_HEIGHT)))
+            explosion.radius = rand.random() * 6
+            explosions.append(explosion)
+
+        for name, test in (('scan', _scan_explosions), ('grid', _grid_explosions)):
+            run = lambda: test(asteroids, explosions)
+            best = min(timeit.repeat(run, repeat=repeat, number=number))
+            per_step = best / number
+            results.append((name, explosion_count, asteroid_count, per_step))
+            print('explosions %-4s %4d x %-5d %10.3f msec/step' % (
+                name, explosion_count, asteroid_count, per_step * 1000))
+    return results
+
+
+def bench_projectiles(counts=(10, 100, 1000), steps=100):
+    """
+    Compare the cost of moving asteroids and missiles and growing
+    explosions in the list and array projectile stores.
+
+    """
+
+    results = []
+    for engine in (projectiles.ENGINE_LIST, projectiles.ENGINE_ARRAY):
+        for count in counts:
+            rand = random.Random(0)
+            stores = []
+            for kind in (gameObjects.Asteroid, gameObjects.Missile, gameObjects.Explosion):
+                store = projectiles.make_store(kind, engine)
+                for n in xrange(count):
+                    position = (rand.randint(0, model.ARCADE_WIDTH), 0)
+                    if kind is gameObjects.Explosion:
+                        store.spawn(position)
+                    else:
+                        store.spawn(position, (rand.randint(0, model.ARCADE_WIDTH),
+                                               model.ARCADE_HEIGHT))
+                stores.append(store)
+            asteroids, missiles, explosions = stores
+            started = timeit.default_timer()
+            for step in xrange(steps):
+                asteroids.move()
+                missiles.move()
+                explosions.grow()
+            elapsed = timeit.default_timer() - started
+            per_step = elapsed / steps
+            results.append((engine, count, per_step))
+            print('projectiles %-6s %5d each %10.3f msec/step' % (
+                engine, count, per_step * 1000))
+    return results
+
+
+def _scan_closest_turret(bases, position):
+    """
+    The closest ready turret search the model used before the registries,
+    over a {position: base} dictionary.
+
+    """
+
+    chosen_one = None
+    chosen_dist = model.ARCADE_HEIGHT
+    for key, thing in bases.items():
+        if isinstance(thing, gameObjects.Turret):
+            if thing.ready:
+                distance = helper.distance(* position + thing.position)
+                if distance < chosen_dist:
+                    chosen_dist = distance
+                    chosen_one = thing
+    return chosen_one
+
+
+def bench_turrets(sizes=(20, 200, 2000), turrets=8, repeat=5, number=200):
+    """
+    Compare the cost of finding the closest ready turret on moon bases
+    of different sizes, scanning the base against the ready turrets.
+
+    """
+
+    rand = random.Random(0)
+    results = []
+    for size in sizes:
+        base = moonbase.Moonbase(model.ARCADE_WIDTH, model.ARCADE_HEIGHT, 1, ())
+        for n in xrange(size):
+            base.add(gameObjects.LunarLand((n % model.ARCADE_WIDTH,
+                model.ARCADE_HEIGHT - 1 - n // model.ARCADE_WIDTH)))
+        for n in xrange(turrets):
+            base.add(gameObjects.Turret((rand.randint(0, model.ARCADE_WIDTH), n)))
+        targets = [(rand.randint(0, model.ARCADE_WIDTH), rand.randint(0, 150))
+                   for n in xrange(50)]
+
+        bases = dict(base.items())
+
+        def scan():
+            for target in targets:
+                _scan_closest_turret(bases, target)
+
+        def ready():
+            for target in targets:
+                base.closest_ready_turret(target, model.ARCADE_HEIGHT)
+
+        for name, run in (('scan', scan), ('ready', ready)):
+            best = min(timeit.repeat(run, repeat=repeat, number=number))
+            per_lookup = best / (number * len(targets))
+            results.append((name, size, per_lookup))
+            print('turrets %-6s %5d bases %8.3f usec/lookup' % (
+                name, size, per_lookup * 1e6))
+    return results
+
+
+def _puzzle_game(size, engine, gravity=puzzle.GRAVITY_STEPPED):
+    """
+    Get a model playing the puzzle phase on a board of the given size,
+    with columns of flotsam already settled on the bottom tenth.
+    Returns the event manager and the game.
+
+    """
+
+    evman = EventManager()
+    game = model.MoonModel(evman)
+    game.puzzle_size = size
+    game.puzzle_engine = engine
+    game.puzzle_gravity = gravity
+    game.new_or_continue()
+    board = game.puzzle_board
+    width, height = size
+    for x in xrange(width):
+        column = random.randint(0, height // 10)
+        if column:
+            board.merge(
+                [[random.choice(model.FLOTSAM)] for y in xrange(column)],
+                (x, height - column))
+    return evman, game
+
+
+def _piece_in_play(game):
+    """
+    Get the player puzzle piece, or None before the first is dealt.
+
+    """
+
+    current = game.puzzle_piece
+    return current and current[0]
+
+
+def bench_puzzle(sizes=((10, 10), (100, 100), (1000, 1000)), pieces=20):
+    """
+    Report puzzle steps per second on boards of growing size, playing
+    pieces until they land, with the player moving and rotating at random.
+
+    After each step the changed cells are read with puzzle_changes(), as the
+    view does, and after each landing every block is read with
+    puzzle_board_data(include_empty=False). Both are timed apart from
+    the steps.
+
+    """
+
+    engines = [puzzle.ENGINE_LIST]
+    if puzzle.numpy is not None:
+        engines.append(puzzle.ENGINE_ARRAY)
+    timer = timeit.default_timer
+    results = []
+    for engine, gravity, size in itertools.product(
+            engines, (puzzle.GRAVITY_STEPPED, puzzle.GRAVITY_SETTLE), sizes):
+        random.seed(0)
+        stepping = changing = reading = 0.0
+        steps = 0
+        game = None
+        for count in xrange(pieces):
+            # start over when the board fills up, outside of the timing
+            if game is None or game.state != model.STATE_PHASE1:
+                evman, game = _puzzle_game(size, engine, gravity)
+                actions = (game.move_left, game.move_right,
+                           game.rotate_puzzle, game.move_down)
+                version = game.puzzle_version
+            piece = _piece_in_play(game)
+            while (game.state == model.STATE_PHASE1 and
+                    _piece_in_play(game) is piece):
+                started = timer()
+                random.choice(actions)()
+                evman.Post(StepGameEvent.acquire())
+                stepped = timer()
+                game.puzzle_changes(version)
+                version = game.puzzle_version
+                changing += timer() - stepped
+                stepping += stepped - started
+                steps += 1
+            started = timer()
+            for cell in game.puzzle_board_data(include_empty=False):
+                pass
+            reading += timer() - started
+        per_second = steps / stepping
+        results.append((engine, gravity, size, per_second))
+        print('puzzle %-6s %-8s %4dx%-4d %10.1f steps/s %8.1f usec/changes '
+              '%8.2f msec/board' % (
+            engine, gravity, size[0], size[1], per_second,
+            changing * 1e6 / steps, reading * 1e3 / pieces))
+    return results
+
+
+def bench_bot(pieces=300):
+    """
+    Report how many landings per second the puzzle bot searches, while
+    it plays a game on the normal board.
+
+    """
+
+    random.seed(0)
+    game = None
+    searched = 0
+    elapsed = 0.0
+    for count in xrange(pieces):
+        if game is None or game.state != model.STATE_PHASE1:
+            if game:
+                searched += player.landings_searched
+            evman, game = _puzzle_game((model.PUZZLE_WIDTH, model.PUZZLE_HEIGHT),
+                                       puzzle.ENGINE_LIST)
+            player = bot.PuzzleBot(None, game)
+        started = timeit.default_timer()
+        player.play_piece()
+        elapsed += timeit.default_timer() - started
+        evman.Post(StepGameEvent.acquire())
+    searched += player.landings_searched
+    per_second = searched / elapsed
+    print('bot %10.1f landings/s, %.3f msec/piece' % (
+        per_second, elapsed * 1000 / pieces))
+    return per_second
+
+
+def _swarm_view(evman, game):
+    """
+    Get a view drawing the game on a display-less screen, or None if
+    pygame is not installed.
+
+    """
+
+    try:
+        import view
+    except ImportError:
+        return None
+    # draw off screen, so this runs without a display
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    graphics = view.MoonView(evman, game)
+    evman.Post(InitializeEvent())
+    return graphics
+
+
+def _swarm_game(count, engine, render):
+    """
+    Get a model playing the arcade in swarm stress mode, with count
+    asteroids spread over the upper half of the field and an explosion
+    for every twenty of them.
+    Returns the event manager, the game and its view, which is None
+    without render.
+
+    """
+
+    evman = EventManager()
+    game = model.MoonModel(evman)
+    graphics = render and _swarm_view(evman, game)
+    game.swarm(cap=count)
+    game.arcade_engine = engine
+    game.new_or_continue()
+    game.next_phase()
+    game.next_phase()
+    rand = random.Random(0)
+    width, height = game.arcade_size
+    for n in xrange(count):
+        game.spawn_asteroid(
+            (rand.randint(0, width), rand.randint(0, height // 2)),
+            (rand.randint(0, width), height))
+    for n in xrange(count // 20):
+        game.spawn_explosion(
+            (rand.randint(0, width), rand.randint(0, height // 2)))
+    return evman, game, graphics
+
+
+def bench_swarm(counts=(100, 1000, 10000), steps=30, render=True):
+    """
+    Report the time of an arcade step, and of drawing it, against the
+    number of asteroids and explosions in play in the swarm stress mode.
+    Drawing is only timed when pygame is installed.
+
+    """
+
+    engines = [projectiles.ENGINE_LIST]
+    if projectiles.numpy is not None:
+        engines.append(projectiles.ENGINE_ARRAY)
+    results = []
+    for engine in engines:
+        for count in counts:
+            random.seed(0)
+            evman, game, graphics = _swarm_game(count, engine, render)
+            # swarms post their movement in frames, count what they carry
+            frames = []
+            evman.RegisterHandler(ArcadeFrameEvent, frames.append)
+            step_time = 0.0
+            render_time = 0.0
+            for step in xrange(steps):
+                started = timeit.default_timer()
+                evman.Post(StepGameEvent.acquire())
+                step_time += timeit.default_timer() - started
+                if graphics:
+                    started = timeit.default_timer()
+                    graphics.render()
+                    render_time += timeit.default_timer() - started
+            entities = sum(len(frame.asteroid_ids) + len(frame.explosion_ids)
+                           for frame in frames)
+            per_step = step_time / steps
+            per_render = graphics and render_time / steps
+            results.append((engine, count, entities // steps, per_step, per_render))
+            if graphics:
+                drawn = '%8.3f msec/render' % (per_render * 1000)
+            else:
+                drawn = '(render needs pygame)'
+            print('swarm %-6s %5d asteroids %6d entities %8.3f msec/step %s' % (
+                engine, count, entities // steps, per_step * 1000, drawn))
+    return results
+
+
+BENCHMARKS = {
+    'dispatch': bench_dispatch,
+    'collision': bench_collision,
+    'puzzle': bench_puzzle,
+    'bot': bench_bot,
+    'explosions': bench_explosions,
+    'projectiles': bench_projectiles,
+    'turrets': bench_turrets,
+    'swarm': bench_swarm,
+    }
+
+
+def main(names):
+    trace.TRACE = False
+    for name in names or sorted(BENCHMARKS):
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,323 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+# Puzzle autoplayer
+#
+# The PuzzleBot plays the puzzle phases for unattended soak and performance
+# runs. It reads the board and piece from the model, and plays with the
+# moves a player has: move_left, move_right, rotate_puzzle and move_down.
+#
+# For each new piece it finds every landing it can reach, by turning the
+# piece where it is, sliding it sideways and dropping it, and scores each
+# landing by the block pairs it would make. The search tests collisions
+# with the board occupancy masks, see the puzzle module.
+#
+# A multiprocessing pool can be given to score the piece rotations in
+# parallel. Sending the board to the workers costs more than the search
+# on small boards, so it only pays on big ones:
+#
+#   pool = multiprocessing.Pool()
+#   bot = PuzzleBot(evman, engine, pool)
+#
+# The ArcadeBot defends the moon base in the arcade phase. It fires at the
+# lowest asteroid in range whenever a turret is ready, aiming ahead by how
+# far the asteroid falls while the missile flies.
+
+
+import itertools
+import model
+import helper
+import trace
+from statemachine import *
+from eventmanager import *
+
+
+# the states the bots play in
+PUZZLE_STATES = (STATE_PHASE1, STATE_PHASE2)
+ARCADE_STATES = (STATE_PHASE3,)
+
+# {block: set of the blocks it pairs with}, from the model BLOCK_PAIRS
+PAIRS_WITH = {}
+for block_a, block_b in model.BLOCK_PAIRS.values():
+    PAIRS_WITH.setdefault(block_a, set()).add(block_b)
+    PAIRS_WITH.setdefault(block_b, set()).add(block_a)
+
+
+def score_landing(board, turn, x, y):
+    """
+    Score a piece rotation resting at x, y on the board as
+
+        (pairs made, how low it rests, -holes left under it)
+
+    which compare in that order.
+
+    """
+
+    cells = {}
+    for cy, row in enumerate(turn):
+        for cx, cell in enumerate(row):
+            if cell:
+                cells[(x + cx, y + cy)] = cell
+
+    # each block pairs once, with a piece or board neighbor
+    paired = set()
+    pairs = 0
+    for position, cell in sorted(cells.items()):
+        partners = PAIRS_WITH.get(cell, None)
+        if not partners or position in paired:
+            continue
+        cx, cy = position
+        for neighbor in ((cx, cy + 1), (cx + 1, cy), (cx, cy - 1), (cx - 1, cy)):
+            if neighbor in paired:
+                continue
+            block = cells.get(neighbor, None) or board.block_at(*neighbor)
+            if block in partners:
+                paired.add(position)
+                paired.add(neighbor)
+                pairs += 1
+                break
+
+    holes = 0
+    for cx, cy in cells:
+        if (cx, cy + 1) not in cells and board.block_at(cx, cy + 1) == 0:
+            holes += 1
+
+    return (pairs, y + len(turn), -holes)
+
+
+def score_rotation(job):
+    """
+    Find and score the landings of one piece rotation.
+
+    job is (board, rotation, turn, mask, y, columns): the piece rotation
+    with its cells and collision mask, the row it falls from, and the
+    columns it can be slid to.
+
+    Returns a list of (score, rotation, x, y) landings.
+
+    """
+
+    board, rotation, turn, mask, start_y, columns = job
+    collides = board.collides
+    landings = []
+    for x in columns:
+        y = start_y
+        while not collides(turn, (x, y + 1), mask):
+            y += 1
+        landings.append((score_landing(board, turn, x, y), rotation, x, y))
+    return landings
+
+
+class PuzzleBot(object):
+    """
+    Plays the puzzle phases of a model, making a move each tick.
+
+    Without an event manager it does not listen for ticks, call act() or
+    play_piece() to make it move.
+
+    """
+
+    def __init__(self, eventmanager, model, pool=None):
+        self.evman = eventmanager
+        self.model = model
+        self.pool = pool
+        # the (piece, rotation, x) we are moving the piece to
+        self.target = None
+        self._piece = None
+        self.pieces_played = 0
+        self.landings_searched = 0
+        if eventmanager:
+            self.evman.RegisterHandler(TickEvent, self.on_tick)
+
+    def on_tick(self, event):
+        self.act()
+
+    def search(self):
+        """
+        Get the (score, rotation, x, y) of every landing the current
+        piece can reach.
+
+        """
+
+        piece, rotation, (x, y) = self.model.puzzle_piece
+        board = self.model.puzzle_board
+        jobs = []
+        # the model turns pieces clockwise where they are
+        for rotation in range(rotation, 4) + range(rotation):
+            turn = piece.turns[rotation]
+            mask = piece.masks[rotation]
+            if board.collides(turn, (x, y), mask):
+                break
+            jobs.append((board, rotation, turn, mask, y,
+                         self._columns(board, turn, mask, x, y)))
+
+        if self.pool:
+            results = self.pool.map(score_rotation, jobs)
+        else:
+            results = map(score_rotation, jobs)
+        landings = [landing for result in results for landing in result]
+        self.landings_searched += len(landings)
+        return landings
+
+    def _columns(self, board, turn, mask, x, y):
+        """
+        Get the columns the piece rotation can slide to from x on row y.
+
+        """
+
+        left = x
+        while left > 0 and not board.collides(turn, (left - 1, y), mask):
+            left -= 1
+        right = x
+        while not board.collides(turn, (right + 1, y), mask):
+            right += 1
+        return range(left, right + 1)
+
+    def choose(self):
+        """
+        Choose the best landing for the current piece.
+        Returns the (piece, rotation, x) to move to, or None.
+
+        """
+
+        landings = self.search()
+        if not landings:
+            return None
+        score, rotation, x, y = max(landings)
+        trace.debug('bot lands rotation %s at %s, %s scoring %s',
+            rotation, x, y, score)
+        return (self.model.puzzle_piece[0], rotation, x)
+
+    def act(self):
+        """
+        Make the next move toward the chosen landing.
+        Returns False if there was nothing to do.
+
+        """
+
+        game = self.model
+        if (game.state not in PUZZLE_STATES or game.paused or
+                not game.isplaying or not game.puzzle_piece):
+            return False
+
+        current = game.puzzle_piece
+        piece, rotation, (x, y) = current
+        if piece is not self._piece:
+            self._piece = piece
+            self.pieces_played += 1
+            self.target = None
+        if self.target is None:
+            self.target = self.choose()
+        if self.target is None:
+            return False
+
+        target_piece, target_rotation, target_x = self.target
+        if rotation != target_rotation:
+            game.rotate_puzzle()
+        elif x < target_x:
+            game.move_right()
+        elif x > target_x:
+            game.move_left()
+        else:
+            game.move_down()
+
+        # the game may have dropped the piece where the move is blocked
+        if game.puzzle_piece == current:
+            self.target = None
+        return True
+
+    def play_piece(self):
+        """
+        Move the current piece all the way to its landing.
+        Returns the number of moves made.
+
+        """
+
+        game = self.model
+        if not game.puzzle_piece:
+            return 0
+        piece = game.puzzle_piece[0]
+        # more moves than a piece can need, should the model disagree
+        limit = 8 + 2 * game.puzzle_board.width + game.puzzle_board.height
+        moves = 0
+        while moves < limit and self.act():
+            moves += 1
+            if not game.puzzle_piece or game.puzzle_piece[0] is not piece:
+                break
+        return moves
+
+
+class ArcadeBot(object):
+    """
+    Plays the arcade phase of a model, firing a missile each tick there
+    is a ready turret.
+
+    Without an event manager it does not listen for ticks, call act() to
+    make it fire.
+
+    """
+
+    def __init__(self, eventmanager, model):
+        self.evman = eventmanager
+        self.model = model
+        self.missiles_fired = 0
+        if eventmanager:
+            self.evman.RegisterHandler(TickEvent, self.on_tick)
+
+    def on_tick(self, event):
+        self.act()
+
+    def target(self):
+        """
+        Get the position to fire at, ahead of the lowest asteroid that is
+        above the targeting boundary, or None.
+
+        """
+
+        game = self.model
+        # the model does not allow targeting below this
+        boundary = game.arcade_size[1] - (
+            (model.BASE_HEIGHT + 4) * model.BLOCK_PADDING)
+        xs, ys = game.asteroid_coordinates
+        lowest = None
+        for x, y in itertools.izip(xs, ys):
+            if y < boundary and (lowest is None or y > lowest[1]):
+                lowest = (x, y)
+        if lowest is None:
+            return None
+        turret = game.closest_ready_turret(lowest)
+        if turret is None:
+            return None
+        # lead the asteroid by how far it falls while the missile flies
+        flight = helper.distance(*lowest + turret.position) / model.MISSILE_SPEED
+        lead = int(flight * model.ASTEROID_SPEED)
+        return (lowest[0], min(lowest[1] + lead, boundary - 1))
+
+    def act(self):
+        """
+        Fire at the next target.
+        Returns False if there was nothing to do.
+
+        """
+
+        game = self.model
+        if (game.state not in ARCADE_STATES or game.paused or
+                not game.isplaying):
+            return False
+
+        position = self.target()
+        if position is None:
+            return False
+        game.fire_missile(position)
+        self.missiles_fired += 1
+        return True
@@ -47,7 +47,8 @@ class MoonController(object):
 
     def __init__(self, eventmanager, model, view):
         self.evman = eventmanager
-        self.evman.RegisterListener(self)
+        self.evman.RegisterHandler(TickEvent, self.on_tick)
+        self.evman.RegisterHandler(StateEvent, self.on_state)
         self.model = model
         self.view = view
         self.puzzle_update_freq = PUZZLE_SPEEDS[0]
@@ -94,87 +95,89 @@ class MoonController(object):
         max_time = PLAYTIME.get(model_state, 0)
         if (max_time and self.time_left == 0):
             self.time_left = max_time
-            self.model._next_phase()
+            self.model.next_phase()
 
-    def notify(self, event):
+    def on_tick(self, event):
         """
-        Called by an event in the message queue.
+        Called on each TickEvent.
 
         """
 
-        if isinstance(event, TickEvent):
+        ticks = pygame.time.get_ticks()
+        state = self.model.state
 
-            ticks = pygame.time.get_ticks()
-            state = self.model.state
+        # update the model pause state
+        self.model.paused = self.view.transitioning
 
-            # update the model pause state
-            self.model.paused = self.view.transitioning
+        # step the model if it is time
+        if self.can_step_model(ticks, state):
+            self.evman.Post(StepGameEvent.acquire())
+            # update the playtime countdown
+            self.playtime_countdown(ticks, state)
 
-            # step the model if it is time
-            if self.can_step_model(ticks, state):
-                self.evman.Post(StepGameEvent())
-                # update the playtime countdown
-                self.playtime_countdown(ticks, state)
+        for event in pygame.event.get():
 
-            for event in pygame.event.get():
+            # always handle window closing events
+            if event.type == QUIT:
+                self.evman.Post(QuitEvent())
 
-                # always handle window closing events
-                if event.type == QUIT:
-                    self.evman.Post(QuitEvent())
+            # all key downs
+            if event.type == KEYDOWN:
 
-                # all key downs
-                if event.type == KEYDOWN:
+                if event.key == K_F11:
+                    self.view.toggle_fullscreen()
 
-                    if event.key == K_F11:
-                        self.view.toggle_fullscreen()
+                if state == STATE_MENU:
+                    self.menu_keys(event)
 
-                    if state == STATE_MENU:
-                        self.menu_keys(event)
+                elif state in (STATE_PHASE1, STATE_PHASE2):
+                    self.puzzle_keys(event)
 
-                    elif state in (STATE_PHASE1, STATE_PHASE2):
-                        self.puzzle_keys(event)
+                elif state in (STATE_PHASE3, STATE_REPRIEVE):
+                    self.arcade_keys(event)
 
-                    elif state in (STATE_PHASE3, STATE_REPRIEVE):
-                        self.arcade_keys(event)
+                elif state == STATE_LEVELDONE:
+                    self.level_done_keys(event)
 
-                    elif state == STATE_LEVELDONE:
-                        self.level_done_keys(event)
+                elif state == STATE_HELP:
+                    self.help_keys(event)
 
-                    elif state == STATE_HELP:
-                        self.help_keys(event)
+                else:
+                    # allow escaping from unhandled states
+                    if (event.key in (K_ESCAPE, K_RETURN, K_SPACE)):
+                        self.model.escape_state()
 
-                    else:
-                        # allow escaping from unhandled states
-                        if (event.key in (K_ESCAPE, K_RETURN, K_SPACE)):
-                            self.model.escape_state()
+            elif event.type == MOUSEBUTTONDOWN:
 
-                elif event.type == MOUSEBUTTONDOWN:
+                if state in (STATE_PHASE3, STATE_REPRIEVE):
+                    pos = self.view.convert_screen_to_arcade(event.pos)
+                    self.model.fire_missile(pos)
 
-                    if state in (STATE_PHASE3, STATE_REPRIEVE):
-                        pos = self.view.convert_screen_to_arcade(event.pos)
-                        self.model.fire_missile(pos)
+            elif event.type == MENU_TICK_EVENT:
+                self.view.menu_ticker_step()
 
-                elif event.type == MENU_TICK_EVENT:
-                    self.view.menu_ticker_step()
+    def on_state(self, event):
+        """
+        Called on each StateEvent.
 
-        elif isinstance(event, StateEvent):
+        """
 
-            # reset the time passed counter on state changes
-            self.time_left = PLAYTIME.get(self.model.state, 0)
+        # reset the time passed counter on state changes
+        self.time_left = PLAYTIME.get(self.model.state, 0)
 
-            # set the arcade speed per level
-            speed_index = helper.clamp(self.model.level - 1, 0, len(ARCADE_SPEEDS) - 1)
-            self.arcade_update_freq = ARCADE_SPEEDS[speed_index]
+        # set the arcade speed per level
+        speed_index = helper.clamp(self.model.level - 1, 0, len(ARCADE_SPEEDS) - 1)
+        self.arcade_update_freq = ARCADE_SPEEDS[speed_index]
 
-            # set the puzzle speed per level
-            speed_index = helper.clamp(self.model.level - 1, 0, len(PUZZLE_SPEEDS) - 1)
-            self.puzzle_update_freq = PUZZLE_SPEEDS[speed_index]
+        # set the puzzle speed per level
+        speed_index = helper.clamp(self.model.level - 1, 0, len(PUZZLE_SPEEDS) - 1)
+        self.puzzle_update_freq = PUZZLE_SPEEDS[speed_index]
 
-            # set a menu timer for text animations
-            if event.state == STATE_MENU:
-                pygame.time.set_timer(MENU_TICK_EVENT, 1000)
-            else:
-                pygame.time.set_timer(MENU_TICK_EVENT, 0)
+        # set a menu timer for text animations
+        if event.state == STATE_MENU:
+            pygame.time.set_timer(MENU_TICK_EVENT, 1000)
+        else:
+            pygame.time.set_timer(MENU_TICK_EVENT, 0)
 
     def menu_keys(self, event):
 
@@ -205,7 +208,7 @@ class MoonController(object):
             self.model.move_down()
 
         elif event.key == K_F2:
-            self.model._next_phase()
+            self.model.next_phase()
 
         elif event.key == K_F3:
             self.model._puzzle_spawn_player_piece()
@@ -216,12 +219,12 @@ class MoonController(object):
             self.model.escape_state()
 
         elif event.key == K_F2:
-            self.model._next_phase()
+            self.model.next_phase()
 
     def level_done_keys(self, event):
 
         if event.key in (K_ESCAPE, K_SPACE):
-            self.model._next_phase()
+            self.model.next_phase()
 
     def help_keys(self, event):
 
@@ -12,60 +12,378 @@
 #  along with this program. If not, see http://www.gnu.org/licenses/.
 
 
+import json
+import timeit
 import trace
 
 
+# the most spent instances kept per pooled event class
+POOL_LIMIT = 1024
+
+
 class EventManager(object):
+    """
+    Posts events to registered listeners and handlers.
+
+    Listeners registered with RegisterListener() have their notify()
+    called for every posted event. Handlers registered with RegisterHandler()
+    are only called for events of the class they subscribed to (or a
+    subclass of it). Both are called in the order they were registered.
+
+    By default Post() calls the handlers right away. In queued mode posted
+    events are stored in a fixed size ring buffer instead, and the buffer
+    is drained each time a TickEvent is posted, before the tick itself is
+    handled. At most drain_budget events are handled per tick (None means
+    until the queue is empty), the rest wait for the next tick.
+    If the ring buffer is full it doubles in size, so events are always
+    handled in the order they were posted. overflow_count counts how many
+    times the buffer grew; raise queue_size if it is not zero.
 
-    def __init__(self):
+    """
+
+    def __init__(self, queued=False, queue_size=1024, drain_budget=None):
         self.listeners = []
+        # (event class, callable) pairs in registration order.
+        # An event class of None means the callable receives every event.
+        self._registrations = []
+        # maps an event type to the tuple of callables that handle it.
+        # built on demand and invalidated when registrations change.
+        self._dispatch = {}
+        # the deferred event ring buffer
+        self.queued = queued
+        self.drain_budget = drain_budget
+        self._queue = [None] * queue_size
+        self._queue_head = 0
+        self._queue_count = 0
+        # times the queue was full and had to grow
+        self.overflow_count = 0
+        # events still waiting in the queue after the last drain
+        self.deferred_count = 0
 
     def RegisterListener(self, listener):
         self.listeners.append(listener)
+        self._registrations.append((None, listener.notify))
+        self._dispatch = {}
 
     def UnregisterListener(self, listener):
         if listener in self.listeners:
             self.listeners.remove(listener)
+        # drop the listener notify() and any handlers bound to it
+        self._registrations = [
+            (event_class, handler)
+            for event_class, handler in self._registrations
+            if getattr(handler, '__self__', None) is not listener
+            ]
+        self._dispatch = {}
+
+    def RegisterHandler(self, event_class, handler):
+        """
+        Call handler(event) for each posted event of event_class.
+
+        """
+
+        self._registrations.append((event_class, handler))
+        self._dispatch = {}
+
+    def UnregisterHandler(self, event_class, handler):
+        if (event_class, handler) in self._registrations:
+            self._registrations.remove((event_class, handler))
+            self._dispatch = {}
+
+    def GetHandlers(self, event_type):
+        """
+        Get the tuple of callables that handle the given event type.
+
+        """
+
+        handlers = self._dispatch.get(event_type, None)
+        if handlers is None:
+            handlers = tuple(
+                handler for event_class, handler in self._registrations
+                if event_class is None or issubclass(event_type, event_class))
+            self._dispatch[event_type] = handlers
+        return handlers
 
     def Post(self, event):
 
-        if type(event) not in (TickEvent,
-                                InputEvent,
-                                StepGameEvent,
-                                AsteroidMovedEvent,
-                                MissileMovedEvent,
-                                ExplosionGrowEvent,
-                                ):
-            trace.write(str(event))
-        for listener in self.listeners:
-            listener.notify(event)
+        if self.queued:
+            if type(event) is TickEvent:
+                self.Drain()
+            else:
+                if self._queue_count == len(self._queue):
+                    self._grow_queue()
+                tail = (self._queue_head + self._queue_count) % len(self._queue)
+                self._queue[tail] = event
+                self._queue_count += 1
+                return
+        self._handle(event)
+
+    def _grow_queue(self):
+        """
+        Double the ring buffer, keeping the queued events in order.
+
+        """
+
+        queue = self._queue
+        head = self._queue_head
+        self._queue = queue[head:] + queue[:head] + [None] * max(len(queue), 1)
+        self._queue_head = 0
+        self.overflow_count += 1
+
+    def Drain(self, budget=None):
+        """
+        Handle queued events, including those posted while draining,
+        up to the budget. Returns the number of events handled.
+
+        """
+
+        if budget is None:
+            budget = self.drain_budget
+        queue = self._queue
+        handled = 0
+        while self._queue_count and (budget is None or handled < budget):
+            event = queue[self._queue_head]
+            queue[self._queue_head] = None
+            self._queue_head = (self._queue_head + 1) % len(queue)
+            self._queue_count -= 1
+            self._handle(event)
+            handled += 1
+        self.deferred_count = self._queue_count
+        return handled
+
+    @property
+    def pending(self):
+        """
+        The number of events waiting in the queue.
+
+        """
+
+        return self._queue_count
+
+    def _handle(self, event):
+        event_type = type(event)
+        if event_type not in QUIET_EVENTS:
+            trace.debug('%s', event)
+        for handler in self.GetHandlers(event_type):
+            handler(event)
+        event.release()
+
+    def EnableInstrumentation(self, filename=None):
+        """
+        Start counting posted and handled events, and timing handlers,
+        in self.stats. The stats are written to filename as JSON by
+        DumpStats(), which runs when a QuitEvent is handled. Runs that end
+        another way call it themselves.
+
+        Instrumentation swaps in a counting Post() and a timed _handle(),
+        so there is no cost while it is off.
+
+        """
+
+        self.stats = EventStats()
+        self.stats_filename = filename
+        self.Post = self._post_instrumented
+        self._handle = self._handle_instrumented
+
+    def DisableInstrumentation(self):
+        for name in ('Post', '_handle'):
+            if name in self.__dict__:
+                delattr(self, name)
+
+    def DumpStats(self):
+        """
+        Write the stats to the instrumentation file, if there is one.
+
+        """
+
+        if getattr(self, 'stats_filename', None):
+            self.stats.dump(self.stats_filename)
+
+    def _post_instrumented(self, event):
+        self.stats.count_event(type(event))
+        EventManager.Post(self, event)
+
+    def _handle_instrumented(self, event):
+        event_type = type(event)
+        stats = self.stats
+        stats.handled += 1
+        if event_type not in QUIET_EVENTS:
+            trace.debug('%s', event)
+        for handler in self.GetHandlers(event_type):
+            start = timeit.default_timer()
+            handler(event)
+            stats.time_handler(handler, timeit.default_timer() - start)
+        event.release()
+        if event_type is QuitEvent:
+            self.DumpStats()
+
+
+class EventStats(object):
+    """
+    Counts posted events per event class, and keeps a histogram of
+    handler latency per listener. Posted events that were not handled
+    (yet) are still waiting in the queue of a queued event manager.
 
+    Histogram bucket n counts calls that took less than 2 ** n
+    microseconds (and at least 2 ** (n - 1)), the last bucket counts
+    everything slower. Latency includes the handling of any events
+    posted from within the handler.
 
-class Event(object):
+    """
+
+    BUCKETS = 24
 
     def __init__(self):
-        self.name = 'Generic event'
+        self.started = timeit.default_timer()
+        # event class name: posted count
+        self.event_counts = {}
+        # events handled, of any class
+        self.handled = 0
+        # listener name: [calls, total seconds, histogram]
+        self.listeners = {}
+        # handler: listener name
+        self._handler_names = {}
+
+    def count_event(self, event_type):
+        name = event_type.__name__
+        self.event_counts[name] = self.event_counts.get(name, 0) + 1
+
+    def time_handler(self, handler, seconds):
+        name = self._handler_names.get(handler, None)
+        if name is None:
+            owner = getattr(handler, '__self__', None)
+            if owner is None:
+                name = getattr(handler, '__name__', repr(handler))
+            else:
+                name = type(owner).__name__
+            self._handler_names[handler] = name
+        timing = self.listeners.get(name, None)
+        if timing is None:
+            timing = [0, 0.0, [0] * self.BUCKETS]
+            self.listeners[name] = timing
+        timing[0] += 1
+        timing[1] += seconds
+        bucket = min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)
+        timing[2][bucket] += 1
+
+    @property
+    def elapsed(self):
+        return timeit.default_timer() - self.started
+
+    def report(self):
+        """
+        Get the stats as a dictionary:
+
+            {'elapsed': seconds, 'posted': n, 'handled': n,
+             'events': {name: {'count': n, 'per_second': n}},
+             'listeners': {name: {'calls': n, 'total_ms': ms, 'mean_us': us,
+                                  'histogram_us': {'<1': n, '<2': n, ...}}}}
+
+        """
+
+        elapsed = max(self.elapsed, 1e-9)
+        events = {}
+        for name, count in self.event_counts.items():
+            events[name] = {
+                'count': count,
+                'per_second': count / elapsed,
+                }
+        listeners = {}
+        for name, (calls, seconds, histogram) in self.listeners.items():
+            buckets = {}
+            for n, count in enumerate(histogram):
+                if count:
+                    if n == self.BUCKETS - 1:
+                        buckets['>=%d' % (2 ** (n - 1))] = count
+                    else:
+                        buckets['<%d' % (2 ** n)] = count
+            listeners[name] = {
+                'calls': calls,
+                'total_ms': seconds * 1e3,
+                'mean_us': seconds * 1e6 / calls,
+                'histogram_us': buckets,
+                }
+        return {
+            'elapsed': elapsed,
+            'posted': sum(self.event_counts.values()),
+            'handled': self.handled,
+            'events': events,
+            'listeners': listeners,
+            }
+
+    def dump(self, filename):
+        with open(filename, 'w') as stream:
+            json.dump(self.report(), stream, indent=2, sort_keys=True)
+
+
+class Event(object):
+    """
+    Events keep their name on the class and their data in __slots__.
+
+    Event classes that are posted many times per frame keep a pool of
+    spent instances. Get one with SpamEvent.acquire(...), it is returned
+    to the pool once the event manager handled it, so handlers must not
+    hold on to pooled events. Only acquired events go back to the pool,
+    and only once: events made with SpamEvent(...) are never pooled, so
+    they can be kept and posted again.
+
+    """
+
+    # set while an acquired event is out of its pool
+    __slots__ = ('_acquired',)
+    name = 'Generic event'
+    # a list of spent instances for pooled event classes
+    pool = None
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def acquire(cls, *args):
+        """
+        Get an event from the class pool, or a new one if the pool is empty.
 
-class QuitEvent(Event):
+        """
 
-    def __init__(self):
-        self.name = 'Quit event'
+        if cls.pool:
+            event = cls.pool.pop()
+            event.__init__(*args)
+        else:
+            event = cls(*args)
+        event._acquired = True
+        return event
 
+    def release(self):
+        """
+        Return this event to the class pool, if it came from acquire()
+        and is not back in the pool already.
+        Its data is left as is until the next acquire() overwrites it.
 
-class TickEvent(Event):
+        """
+
+        if getattr(self, '_acquired', False):
+            self._acquired = False
+            pool = self.pool
+            if pool is not None and len(pool) < POOL_LIMIT:
+                pool.append(self)
 
-    def __init__(self):
-        self.name = 'Tick event'
+
+class QuitEvent(Event):
+    __slots__ = ()
+    name = 'Quit event'
+
+
+class TickEvent(Event):
+    __slots__ = ()
+    name = 'Tick event'
+    pool = []
 
 
 class InputEvent(Event):
+    __slots__ = ('char', 'clickpos')
+    name = 'Input event'
 
     def __init__(self, char, clickpos):
-        self.name = 'Input event'
         self.char = char
         self.clickpos = clickpos
 
@@ -75,15 +393,15 @@ class InputEvent(Event):
 
 
 class InitializeEvent(Event):
-
-    def __init__(self):
-        self.name = 'Initialize event'
+    __slots__ = ()
+    name = 'Initialize event'
 
 
 class StateEvent(Event):
+    __slots__ = ('state',)
+    name = 'State event'
 
     def __init__(self, state):
-        self.name = 'State event'
         self.state = state
 
     def __str__(self):
@@ -97,154 +415,217 @@ class ResetGameEvent(Event):
 
     """
 
-    def __init__(self):
-        self.name = 'Reset game event'
+    __slots__ = ()
+    name = 'Reset game event'
 
 
 class StepGameEvent(Event):
-
-    def __init__(self):
-        self.name = 'Step game event'
+    __slots__ = ()
+    name = 'Step game event'
+    pool = []
 
 
 class LunarLandscapeClearedEvent(Event):
-
-    def __init__(self):
-        self.name = 'Lunar landscape cleared event'
+    __slots__ = ()
+    name = 'Lunar landscape cleared event'
 
 
 class LunarLandSpawnEvent(Event):
+    __slots__ = ('land',)
+    name = 'Lunar land spawn event'
 
     def __init__(self, land):
-        self.name = 'Lunar land spawn event'
         self.land = land
 
 
 class MooncreteSpawnEvent(Event):
+    __slots__ = ('mooncrete',)
+    name = 'Mooncrete spawned event'
 
     def __init__(self, mooncrete):
-        self.name = 'Mooncrete spawned event'
         self.mooncrete = mooncrete
 
 
 class MooncreteDestroyEvent(Event):
+    __slots__ = ('mooncrete',)
+    name = 'Mooncrete destroy event'
 
     def __init__(self, mooncrete):
-        self.name = 'Mooncrete destroy event'
         self.mooncrete = mooncrete
 
 
 class BuildingSpawnEvent(Event):
+    __slots__ = ('building',)
+    name = 'Building spawn event'
 
     def __init__(self, building):
-        self.name = 'Building spawn event'
         self.building = building
 
 
 class BuildingDestroyEvent(Event):
+    __slots__ = ('building',)
+    name = 'Building destroy event'
 
     def __init__(self, building):
-        self.name = 'Building destroy event'
         self.building = building
 
 
 class TurretSpawnedEvent(Event):
+    __slots__ = ('turret',)
+    name = 'Turret spawned event'
 
     def __init__(self, turret):
-        self.name = 'Turret spawned event'
         self.turret = turret
 
 
 class TurretDestroyEvent(Event):
+    __slots__ = ('turret',)
+    name = 'Turret destroy event'
 
     def __init__(self, turret):
-        self.name = 'Turret destroy event'
         self.turret = turret
 
 
 class RadarSpawnedEvent(Event):
+    __slots__ = ('radar',)
+    name = 'Radar spawned event'
 
     def __init__(self, radar):
-        self.name = 'Radar spawned event'
         self.radar = radar
 
 
 class RadarDestroyEvent(Event):
+    __slots__ = ('radar',)
+    name = 'Radar destroy event'
 
     def __init__(self, radar):
-        self.name = 'Radar destroy event'
         self.radar = radar
 
 
 class AsteroidSpawnedEvent(Event):
+    __slots__ = ('asteroid',)
+    name = 'Asteroid spawned event'
 
     def __init__(self, asteroid):
-        self.name = 'Asteroid spawned event'
         self.asteroid = asteroid
 
 
 class AsteroidMovedEvent(Event):
+    __slots__ = ('asteroid',)
+    name = 'Asteroid move event'
+    pool = []
 
     def __init__(self, asteroid):
-        self.name = 'Asteroid move event'
         self.asteroid = asteroid
 
 
 class AsteroidDestroyEvent(Event):
+    __slots__ = ('asteroid',)
+    name = 'Asteroid destroy event'
 
     def __init__(self, asteroid):
-        self.name = 'Asteroid destroy event'
         self.asteroid = asteroid
 
 
 class MissileSpawnedEvent(Event):
+    __slots__ = ('missile',)
+    name = 'Missle spawned event'
 
     def __init__(self, missile):
-        self.name = 'Missle spawned event'
         self.missile = missile
 
 
 class MissileMovedEvent(Event):
+    __slots__ = ('missile',)
+    name = 'Missle moved event'
+    pool = []
 
     def __init__(self, missile):
-        self.name = 'Missle moved event'
         self.missile = missile
 
 
 class MissileDestroyEvent(Event):
+    __slots__ = ('missile',)
+    name = 'Missle destroy event'
 
     def __init__(self, missile):
-        self.name = 'Missle destroy event'
         self.missile = missile
 
 
 class ExplosionSpawnEvent(Event):
+    __slots__ = ('explosion',)
+    name = 'Explosion spawn event'
 
     def __init__(self, explosion):
-        self.name = 'Explosion spawn event'
         self.explosion = explosion
 
 
 class ExplosionGrowEvent(Event):
+    __slots__ = ('explosion',)
+    name = 'Explosion grow event'
+    pool = []
 
     def __init__(self, explosion):
-        self.name = 'Explosion grow event'
         self.explosion = explosion
 
 
 class ExplosionDestroyEvent(Event):
+    __slots__ = ('explosion',)
+    name = 'Explosion destroy event'
 
     def __init__(self, explosion):
-        self.name = 'Explosion destroy event'
         self.explosion = explosion
 
 
+class ArcadeFrameEvent(Event):
+    """
+    Carries the state of every moving arcade object after a game step,
+    in place of one moved or grow event per object.
+
+    The positions are packed in flat arrays of (x, y) pairs that line up
+    with the matching id tuples:
+
+        asteroid_ids[n] is at asteroid_positions[n * 2: n * 2 + 2]
+
+    """
+
+    __slots__ = (
+        'asteroid_ids', 'asteroid_positions',
+        'missile_ids', 'missile_positions',
+        'explosion_ids', 'explosion_radii',
+        )
+    name = 'Arcade frame event'
+
+    def __init__(self, asteroid_ids, asteroid_positions,
+                missile_ids, missile_positions,
+                explosion_ids, explosion_radii):
+        self.asteroid_ids = asteroid_ids
+        self.asteroid_positions = asteroid_positions
+        self.missile_ids = missile_ids
+        self.missile_positions = missile_positions
+        self.explosion_ids = explosion_ids
+        self.explosion_radii = explosion_radii
+
+
 class PuzzleRowCleared(Event):
+    __slots__ = ('row_number',)
+    name = 'Puzzle row cleared event'
 
     def __init__(self, row_number):
-        self.name = 'Puzzle row cleared event'
         self.row_number = row_number
 
     def __str__(self):
 
         return 'Puzzle row %s cleared' % (self.row_number,)
+
+
+# events fired too often to be traced
+QUIET_EVENTS = (
+    TickEvent,
+    InputEvent,
+    StepGameEvent,
+    AsteroidMovedEvent,
+    MissileMovedEvent,
+    ExplosionGrowEvent,
+    ArcadeFrameEvent,
+    )
@@ -15,6 +15,15 @@
 import helper
 
 
+# explosions grow by EXPLOSION_GROWTH each step until they reach this radius.
+EXPLOSION_RADIUS = 6
+EXPLOSION_GROWTH = 0.2
+
+# line points asteroids and missiles cover each step, unless told otherwise.
+ASTEROID_SPEED = 1
+MISSILE_SPEED = 5
+
+
 class LunarLand(object):
     """
     A lunar landscape item. It is solid and gray.
@@ -63,19 +72,21 @@ class Asteroid(object):
 
     """
 
-    def __init__(self, position, destination):
+    def __init__(self, position, destination, speed=ASTEROID_SPEED):
         self.position = position
         self.destination = destination
-        self.trajectory = list(
-            reversed(helper.get_line_segments(position, destination)))
+        self.speed = speed
+        # the line to the destination and the next point on it
+        self.walk = helper.line_walk(position, destination)
+        self.step = 0
+        # given by the projectile store that spawns us
+        self.id = None
 
     def move(self):
-        if self.trajectory:
-            self.position = self.trajectory.pop()
-
-    @property
-    def id(self):
-        return id(self)
+        if self.step <= self.walk[2]:
+            self.position = helper.line_point(self.walk, self.step)
+            self.step += self.speed
+            return True
 
     @property
     def x(self):
@@ -130,21 +141,23 @@ class Missile(object):
 
     """
 
-    def __init__(self, position, destination):
+    def __init__(self, position, destination, speed=MISSILE_SPEED):
         self.position = position
         self.destination = destination
-        self.trajectory = helper.get_line_segments(destination, position)
+        self.speed = speed
+        # the line is walked from the destination end, the way the
+        # turret sights it, and step counts the points from our end.
+        self.walk = helper.line_walk(destination, position)
+        self.step = 0
+        # given by the projectile store that spawns us
+        self.id = None
 
     def move(self):
-        if self.trajectory:
-            self.position = self.trajectory.pop()
-            self.trajectory = self.trajectory[:-4]
+        if self.step <= self.walk[2]:
+            self.position = helper.line_point(self.walk, self.walk[2] - self.step)
+            self.step += self.speed
             return True
 
-    @property
-    def id(self):
-        return id(self)
-
 
 class Explosion(object):
     """
@@ -156,12 +169,10 @@ class Explosion(object):
     def __init__(self, position):
         self.position = position
         self.radius = 0.0
+        # given by the projectile store that spawns us
+        self.id = None
 
     def update(self):
-        if self.radius < 6:
-            self.radius += 0.2
+        if self.radius < EXPLOSION_RADIUS:
+            self.radius += EXPLOSION_GROWTH
             return True
-
-    @property
-    def id(self):
-        return id(self)
@@ -0,0 +1,200 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+# Headless simulation
+#
+# The HeadlessDriver steps a MoonModel as fast as it goes, without pygame,
+# a display or a view, for soak tests and capacity planning:
+#
+#   python -m mooncrete --headless --steps 10000 --seed 1
+#
+# It stands in for the controller. It starts a game from the menu, moves
+# to the next phase after PHASE_STEPS model steps, and plays on past the
+# level done and lose screens, starting a new game when one is lost.
+#
+# Moves come from the bots, a script, or both. A script has one move per
+# line, played before the model step it is numbered with:
+#
+#   # step  move    arguments
+#   3       left
+#   4       rotate
+#   5       down
+#   90      fire    150 80
+#   120     next
+#
+# The moves are those a player has, see SCRIPT_MOVES.
+
+
+import random
+import timeit
+import trace
+import model
+import bot
+from statemachine import *
+from eventmanager import *
+
+
+# model steps each phase lasts. The controller times phases in seconds
+# of play instead, these are about its pace on the first level.
+PHASE_STEPS = {
+    STATE_PHASE1: 30,
+    STATE_PHASE2: 30,
+    STATE_PHASE3: 1800,
+    STATE_REPRIEVE: 100,
+    }
+
+# {script move: (model method, number of arguments)}
+SCRIPT_MOVES = {
+    'left': ('move_left', 0),
+    'right': ('move_right', 0),
+    'down': ('move_down', 0),
+    'rotate': ('rotate_puzzle', 0),
+    'fire': ('fire_missile', 2),
+    'next': ('next_phase', 0),
+    }
+
+
+def read_script(lines):
+    """
+    Read the moves of a script.
+    Returns {step: [(model method name, arguments), ...]}.
+
+    """
+
+    moves = {}
+    for number, line in enumerate(lines, 1):
+        words = line.split('#')[0].split()
+        if not words:
+            continue
+        if len(words) < 2 or words[1] not in SCRIPT_MOVES:
+            raise ValueError('script line %s: unknown move %r' % (number, line.strip()))
+        method, argument_count = SCRIPT_MOVES[words[1]]
+        if len(words) != 2 + argument_count:
+            raise ValueError('script line %s: %s takes %s arguments' % (
+                number, words[1], argument_count))
+        arguments = ()
+        if argument_count:
+            # fire takes a single (x, y) position
+            arguments = (tuple(int(word) for word in words[2:]),)
+        moves.setdefault(int(words[0]), []).append((method, arguments))
+    return moves
+
+
+class HeadlessDriver(object):
+    """
+    Steps a model without a view, playing its moves from a script
+    and the bots.
+
+    """
+
+    def __init__(self, eventmanager, model, script=None, bots=True):
+        self.evman = eventmanager
+        self.evman.RegisterHandler(TickEvent, self.on_tick)
+        self.evman.RegisterHandler(StateEvent, self.on_state)
+        self.model = model
+        self.script = script or {}
+        self.puzzle_bot = None
+        self.arcade_bot = None
+        if bots:
+            self.puzzle_bot = bot.PuzzleBot(None, model)
+            self.arcade_bot = bot.ArcadeBot(None, model)
+        self.steps = 0
+        self.games = 0
+        # model steps taken in the current state
+        self.phase_steps = 0
+
+    def on_tick(self, event):
+        # the controller pauses the model while the view moves panels,
+        # there is no view here to wait for.
+        self.model.paused = False
+
+    def on_state(self, event):
+        self.phase_steps = 0
+
+    def step(self):
+        """
+        Play the moves for this step, and step the model.
+
+        """
+
+        game = self.model
+        state = game.state
+        if state == STATE_MENU:
+            self.games += 1
+            game.new_or_continue()
+        elif state == STATE_LEVELDONE:
+            game.next_phase()
+        elif state == STATE_LOSE:
+            game.escape_state()
+
+        for method, arguments in self.script.get(self.steps, ()):
+            getattr(game, method)(*arguments)
+        if self.puzzle_bot and game.state in bot.PUZZLE_STATES:
+            self.puzzle_bot.play_piece()
+        if self.arcade_bot:
+            self.arcade_bot.act()
+
+        # the tick drains the step in queued dispatch, so both handle
+        # the step before the tick
+        self.evman.Post(StepGameEvent.acquire())
+        self.evman.Post(TickEvent.acquire())
+        self.steps += 1
+        self.phase_steps += 1
+
+        steps = PHASE_STEPS.get(game.state, None)
+        if steps and self.phase_steps >= steps:
+            game.next_phase()
+
+    def run(self, steps):
+        """
+        Take a number of model steps.
+
+        """
+
+        self.model.start()
+        for count in xrange(steps):
+            self.step()
+
+
+def main(steps, seed=None, script=None, bots=True, swarm=False, queued=False,
+         stats=None):
+    """
+    Run the model headless for a number of steps, and report the model
+    steps per second.
+    script is the name of a script file to play.
+    queued runs the event manager in queued mode.
+    stats is the name of a file to write event stats to.
+
+    """
+
+    random.seed(seed)
+    evman = EventManager(queued=queued)
+    if stats:
+        evman.EnableInstrumentation(stats)
+    engine = model.MoonModel(evman)
+    if swarm:
+        engine.swarm()
+    moves = None
+    if script:
+        with open(script) as stream:
+            moves = read_script(stream)
+    driver = HeadlessDriver(evman, engine, moves, bots)
+    started = timeit.default_timer()
+    driver.run(steps)
+    elapsed = timeit.default_timer() - started
+    evman.DumpStats()
+    trace.flush()
+    print('%d steps in %.2f s: %.1f steps/s, %d games, level %d, score %d' % (
+        driver.steps, elapsed, driver.steps / max(elapsed, 1e-9),
+        driver.games, engine.level, engine.score))
+    return driver
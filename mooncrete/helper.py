@@ -59,6 +59,52 @@ def get_line_segments(start, end):
         points.reverse()
     return points
 
+def line_walk(start, end):
+    """
+    Returns the (x1, y1, deltax, deltay, error, ystep, issteep, rev) walk of
+    the line between two points, for line_point() to find the points that
+    get_line_segments() lists without making the list.
+    The line has deltax + 1 points.
+
+    """
+
+    x1, y1 = start
+    x2, y2 = end
+    issteep = abs(y2 - y1) > abs(x2 - x1)
+    if issteep:
+        x1, y1 = y1, x1
+        x2, y2 = y2, x2
+    rev = False
+    if x1 > x2:
+        x1, x2 = x2, x1
+        y1, y2 = y2, y1
+        rev = True
+    deltax = x2 - x1
+    deltay = abs(y2 - y1)
+    error = int(deltax / 2)
+    if y1 < y2:
+        ystep = 1
+    else:
+        ystep = -1
+    return (x1, y1, deltax, deltay, error, ystep, issteep, rev)
+
+def line_point(walk, n):
+    """
+    Returns point n of a line walk, the same as
+    get_line_segments(start, end)[n].
+
+    """
+
+    x1, y1, deltax, deltay, error, ystep, issteep, rev = walk
+    if rev:
+        n = deltax - n
+    # y steps each time the error, less deltay per point, drops below zero
+    y = y1 + ystep * -((error - n * deltay) // max(deltax, 1))
+    x = x1 + n
+    if issteep:
+        return (y, x)
+    return (x, y)
+
 def distance(x, y, u, v):
     """
     Returns the distance between two cartesian points.
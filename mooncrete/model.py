@@ -30,27 +30,38 @@
 
 # Puzzle board description
 #
-# The puzzle board data is stored as a list of lists, allowing a 2D grid-like
-# lookup of values. Each value is either 0 (no block) or a number equals one
-# of the BLOCK_ constants.
+# The puzzle board data is stored in a board object from the puzzle module,
+# allowing a 2D grid-like lookup of values. Each value is either 0 (no block)
+# or a number equals one of the BLOCK_ constants.
 #
 # A 3x3 board:
 # [[0, 0, 0],
 #  [0, 0, 0],
 #  [0, 0, 0]]
 #
+# The board engine is chosen by PUZZLE_ENGINE: a plain list of lists, or a
+# numpy array that works on the whole board at once.
+#
 # It can be iterated over for each row, then for each value in that row.
 # The puzzle_board_data() function does this and yields the index of each item
 # along with the value, for easily accessing the board data:
 #
 #   for x, y, value in puzzle_board_data():
 #       pass
+#
+# The board with the player piece merged in is cached, and puzzle_version
+# goes up each time it changes. Views can skip drawing while the version
+# is the same, or redraw only the cells from puzzle_changes(old_version).
+# Each version keeps the cells the board noted as changed, and where the
+# player shape was before and after, so changes never scan the board.
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
 # Puzzle piece description
 #
 # The puzzle piece the player controls is stored similarly, in a 2D like list
 # of smaller dimensions with the values being those of the BLOCK_ constants.
+# Pieces are dealt from PIECE_CATALOGUE, which has every rotation of the
+# TETRIS_SHAPES ready made, so rotating a piece does not build new lists.
 #
 # A T-shape block
 # [[1, 1, 1],
@@ -59,32 +70,61 @@
 # The puzzle_location var stores where the player piece is currently located
 # within the board. The player can move it around, as long as the new location
 # does not collide with any solid values on the board.
-# The _puzzle_move_piece() and _puzzle_piece_collides() calls handle this.
+# The _puzzle_move_piece() and board collides() calls handle this.
 #
 # Each game step the puzzle piece is dropped down, if there is a collision
 # during this drop, we merge the player piece into the board, and the player
-# is given a new piece to play with. This is handled by the _puzzle_merge_board()
+# is given a new piece to play with. This is handled by the board merge()
 # and _puzzle_next_shape() calls.
 #
 # If there is a collision during creating the new piece, it means the board
 # is full to the point where the puzzle has ended.
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
+# Arcade projectiles description
+#
+# Asteroids, missiles and explosions are kept in stores from the projectiles
+# module, chosen by ARCADE_ENGINE: a list of game objects, or numpy arrays
+# that move and grow them all at once. Removing from a store moves its last
+# item into the gap, so their order changes as they come and go.
+# - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
 
-import math
-import copy
 import random
+import itertools
+import collections
 import trace
-import helper
+import puzzle
+import spatial
+import projectiles
+import moonbase
 from gameObjects import *
 from statemachine import *
 from eventmanager import *
 
 
 # The puzzle mode uses index positioning.
+# This is the default board size, set MoonModel.puzzle_size to change it.
 PUZZLE_WIDTH = 10
 PUZZLE_HEIGHT = 10
 
+# the puzzle board engine, one of the puzzle.ENGINE_ names.
+# The array engines, here and for ARCADE_ENGINE, need numpy. Without it the
+# puzzle and projectiles modules warn and use their list engines, which
+# play the same game, so the array engines are always safe to choose.
+PUZZLE_ENGINE = puzzle.ENGINE_LIST
+
+# how loose blocks fall, one of the puzzle.GRAVITY_ names: a row each step,
+# or straight down onto the blocks below.
+PUZZLE_GRAVITY = puzzle.GRAVITY_STEPPED
+
+# how many past puzzle versions puzzle_changes() can compare against.
+PUZZLE_HISTORY = 16
+
+# the arcade projectile store engine, one of the projectiles.ENGINE_ names,
+# see PUZZLE_ENGINE for the array engine.
+ARCADE_ENGINE = projectiles.ENGINE_LIST
+
 # The arcade size is in a much more refined scale.
 # views should scale accordingly to their screen size.
 ARCADE_WIDTH = 300
@@ -199,8 +239,41 @@ TETRIS_SHAPES = [
      [7, 0]]
     ]
 
-# asteroids within this safe zone cannot be destroyed by explosions.
-ASTEROID_SAFE_ZONE = int(ARCADE_HEIGHT * 0.1)
+# the puzzle pieces dealt to the player, TETRIS_SHAPES in all rotations.
+PIECE_CATALOGUE = puzzle.catalogue(TETRIS_SHAPES)
+
+# asteroids within this safe zone, the top tenth of the arcade, cannot be
+# destroyed by explosions.
+ASTEROID_SAFE_RATIO = 0.1
+ASTEROID_SAFE_ZONE = int(ARCADE_HEIGHT * ASTEROID_SAFE_RATIO)
+
+# asteroids spawned each arcade step, while there are less than the cap.
+ASTEROID_SPAWN_RATE = 1
+
+# the most asteroids in play at once. None allows 6, and 1.5 more a level.
+ASTEROID_CAP = None
+
+# the swarm stress mode arcade size, asteroids spawned each step and the
+# most asteroids in play at once, see MoonModel.swarm().
+SWARM_SIZE = (3000, 3000)
+SWARM_SPAWN_RATE = 100
+SWARM_CAP = 10000
+
+# cell size of the grid that explosions find nearby asteroids with.
+# explosions reach up to 4 times their radius of 6, about 25.
+ARCADE_GRID_CELL = 25
+
+# the event posted when an asteroid destroys a building, turret or radar,
+# by type code.
+BASE_DESTROY_EVENTS = {
+    moonbase.BASE_BUILDING: BuildingDestroyEvent,
+    moonbase.BASE_TURRET: TurretDestroyEvent,
+    moonbase.BASE_RADAR: RadarDestroyEvent,
+    }
+
+# post a single ArcadeFrameEvent per arcade step instead of a moved (or grow)
+# event for each asteroid, missile and explosion.
+BATCH_ARCADE_EVENTS = False
 
 
 class MoonModel(object):
@@ -211,10 +284,16 @@ class MoonModel(object):
 
     def __init__(self, eventmanager):
         self._evman = eventmanager
-        self._evman.RegisterListener(self)
+        self._evman.RegisterHandler(TickEvent, self.on_tick)
+        self._evman.RegisterHandler(StepGameEvent, self.on_step)
+        self._evman.RegisterHandler(QuitEvent, self.on_quit)
         self._state = StateMachine()
         self._pumping = False
 
+        # paces the engine pump when set, see scheduler.FrameScheduler.
+        # Without one we pump as fast as the listeners let us.
+        self.scheduler = None
+
         # the model can chain events to fire after another.
         # this is done by inserting an event in the chain queue just after
         # firing some other events. The model is paused on chaining.
@@ -244,32 +323,71 @@ class MoonModel(object):
 
         # stores the puzzle board
         self._puzzle_board = None
+        self.puzzle_engine = PUZZLE_ENGINE
+        self.puzzle_gravity = PUZZLE_GRAVITY
+        # (width, height) of the puzzle board, read when a game begins.
+        self.puzzle_size = (PUZZLE_WIDTH, PUZZLE_HEIGHT)
 
         # current puzzle shape the player is controlling.
         self._puzzle_shape = None
 
+        # the catalogue piece the shape comes from, and its current rotation.
+        self._puzzle_piece = None
+        self._puzzle_rotation = 0
+
         # location on the board of the puzzle shape.
         self._puzzle_location = None
 
+        # the board rows with the puzzle shape merged in, rebuilt when
+        # the board, shape or location change, which is noted by _puzzle_key.
+        self._puzzle_version = 0
+        self._puzzle_key = None
+        self._puzzle_rows = None
+        # {version: set of changed y * width + x indexes} of recent versions,
+        # oldest first. None means too many cells changed to list.
+        self._puzzle_history = collections.OrderedDict()
+        # {y * width + x: value} of the puzzle shape cells at this version
+        self._puzzle_footprint = {}
+
         # track the last phase the game was in for continuing games from the menu
         self._last_phase = STATE_MENU
 
-        # list of asteroids in the arcade game mode
-        self._asteroids = []
+        # the projectile store engine, read when an arcade phase begins.
+        self.arcade_engine = ARCADE_ENGINE
+
+        # (width, height) of the arcade, read when a game begins.
+        self.arcade_size = (ARCADE_WIDTH, ARCADE_HEIGHT)
+        self._arcade_width, self._arcade_height = self.arcade_size
+        self._asteroid_safe_zone = ASTEROID_SAFE_ZONE
+
+        # asteroids spawned each step, and the most in play at once.
+        self.asteroid_spawn_rate = ASTEROID_SPAWN_RATE
+        self.asteroid_cap = ASTEROID_CAP
+
+        # asteroids in the arcade game mode
+        self._asteroids = projectiles.make_store(Asteroid, self.arcade_engine)
+
+        # asteroid store slots by position, rebuilt each arcade step
+        self._asteroid_grid = spatial.SpatialGrid(ARCADE_GRID_CELL)
 
         # missiles the player has fired
-        self._missiles = []
+        self._missiles = projectiles.make_store(Missile, self.arcade_engine)
 
         # explosions that grow in size
-        self._explosions = []
+        self._explosions = projectiles.make_store(Explosion, self.arcade_engine)
 
-        # store built moonbase objects in a dictionary where the
+        # store built moonbase objects in a Moonbase, where the
         # key is the (x, y) position.
-        self._moonbase = {}
+        self._moonbase = moonbase.Moonbase(
+            self._arcade_width, self._arcade_height, BLOCK_PADDING,
+            self._arcade_iterate_moonscape_blocks())
 
         # lose sequence explosion fascilitator
         self.lose_sequence_explosion_counter = 0
 
+        # post arcade movement as one ArcadeFrameEvent per step
+        self.batch_arcade_events = BATCH_ARCADE_EVENTS
+
     @property
     def state(self):
         """
@@ -288,28 +406,37 @@ class MoonModel(object):
 
         return self._playing
 
-    def notify(self, event):
+    def on_tick(self, event):
         """
-        Called by an event in the message queue.
+        Called on each TickEvent.
 
         """
 
-        if isinstance(event, TickEvent):
-            if not self.paused:
-                self._unchain_events()
+        if not self.paused:
+            self._unchain_events()
 
-        elif isinstance(event, StepGameEvent):
-            if not self.paused:
-                state = self._state.peek()
-                if state in (STATE_PHASE1, STATE_PHASE2):
-                    self._puzzle_step()
-                elif state in (STATE_PHASE3, STATE_LOSE, STATE_REPRIEVE):
-                    self._arcade_step()
+    def on_step(self, event):
+        """
+        Called on each StepGameEvent.
+
+        """
+
+        if not self.paused:
+            state = self._state.peek()
+            if state in (STATE_PHASE1, STATE_PHASE2):
+                self._puzzle_step()
+            elif state in (STATE_PHASE3, STATE_LOSE, STATE_REPRIEVE):
+                self._arcade_step()
+
+    def on_quit(self, event):
+        """
+        Called on a QuitEvent.
+
+        """
 
-        elif isinstance(event, QuitEvent):
-            trace.write('Engine shutting down...')
-            self._pumping = False
-            self.paused = True
+        trace.write('Engine shutting down...')
+        self._pumping = False
+        self.paused = True
 
     def run(self):
         """
@@ -320,21 +447,32 @@ class MoonModel(object):
         """
 
         trace.write('Initializing...')
-        self._evman.Post(InitializeEvent())
+        self.start()
         trace.write('Starting the engine pump...')
-        self._change_state(STATE_MENU)
         self._pumping = True
         while self._pumping:
-            self._evman.Post(TickEvent())
+            self._evman.Post(TickEvent.acquire())
+            if self.scheduler:
+                self.scheduler.wait(self.state, self.paused)
 
         # wow that was easy, huh?
         # If you are confused as to where things go from here:
         # Each of our model, view and controllers is now constantly
-        # receiving TickEvents. Check the notify() calls in each.
+        # receiving TickEvents. Check the on_tick() handlers in each.
         # If you'd like to know more on using the mvc pattern in games
         # see my tutorial on this at:
         # https://github.com/wesleywerner/mvc-game-design :]
 
+    def start(self):
+        """
+        Tells everyone to get ready, and opens the menu.
+        run() starts with this, drivers without a pump call it themselves.
+
+        """
+
+        self._evman.Post(InitializeEvent())
+        self._change_state(STATE_MENU)
+
 #-- Model State Management -- -- -- -- -- -- -- -- -- -- -- -- -- --
 
     def _change_state(self, new_state, swap_state=False):
@@ -427,7 +565,7 @@ class MoonModel(object):
             else:
                 self._evman.Post(event)
 
-    def _next_phase(self):
+    def next_phase(self):
         """
         Moves to the next phase.
 
@@ -438,6 +576,7 @@ class MoonModel(object):
 
         elif self.state == STATE_PHASE2:
             self._puzzle_shape = None
+            self._puzzle_piece = None
             self._arcade_prepare()
             self._change_state(STATE_PHASE3, swap_state=True)
 
@@ -465,44 +604,28 @@ class MoonModel(object):
         self._evman.Post(ResetGameEvent())
         self.level = 1
         self.score = 0
+        self._arcade_width, self._arcade_height = self.arcade_size
+        self._asteroid_safe_zone = int(self._arcade_height * ASTEROID_SAFE_RATIO)
         self._reset_puzzle()
         self._arcade_prepare()
         self._generate_lunar_landscape()
         self._playing = True
 
-    def _unshared_copy(self, inList):
-        """
-        Recursive copy list-of-lists.
-        Because deepcopy keeps list references and changing the result
-        also changes the original.
-
-        """
-
-        if isinstance(inList, list):
-            return list(map(self._unshared_copy, inList))
-        return inList
-
 #-- Puzzle Game Logic -- -- -- -- -- -- -- -- -- -- -- -- -- --
 
     def _puzzle_print_grid(self):
-        if trace.TRACE and self._playing:
+        if self._playing and trace.enabled(trace.DEBUG):
             grid = []
-            # copy the board and place th player piece inside it
-            matrix = self._puzzle_merge_board(
-                    self._puzzle_board,
-                    self._puzzle_shape,
-                    self._puzzle_location
-                    )
-            for y, row in enumerate(matrix):
+            for y, row in enumerate(self.puzzle_board_rows()):
                 grid.append('\n')
                 for x, val in enumerate(row):
                     if val:
                         grid.append(str(val))
                     else:
                         grid.append('__')
-            trace.write(' '.join(grid))
+            trace.debug(' '.join(grid))
 
-    def puzzle_board_data(self, include_player_shape=True):
+    def puzzle_board_data(self, include_player_shape=True, include_empty=True):
         """
         Yields the puzzle board data in the form:
 
@@ -514,41 +637,163 @@ class MoonModel(object):
 
             for x, y, v in this_function():
 
+        Without include_empty only the blocks are given, which is much
+        quicker on big, sparse boards. The player shape blocks come last.
+
         """
 
-        if include_player_shape and self._puzzle_shape:
-            grid = self._puzzle_merge_board(
-                        self._puzzle_board, self._puzzle_shape, self._puzzle_location)
+        if not include_empty:
+            for cell in self._puzzle_board.blocks():
+                yield cell
+            if include_player_shape and self._puzzle_shape:
+                x, y = self._puzzle_location
+                for cy, row in enumerate(self._puzzle_shape):
+                    for cx, cell in enumerate(row):
+                        if cell:
+                            yield (x + cx, y + cy, cell)
+        elif include_player_shape:
+            for y, row in enumerate(self.puzzle_board_rows()):
+                for x, cell in enumerate(row):
+                    yield (x, y, cell)
         else:
-            grid = self._puzzle_board
-        for y, row in enumerate(grid):
-            for x, cell in enumerate(row):
-                yield (x, y, cell)
+            for cell in self._puzzle_board.cells():
+                yield cell
 
-    def _reset_puzzle(self):
+    @property
+    def puzzle_board(self):
         """
-        Reset the puzzle game.
+        The puzzle board object, for reading only.
 
         """
 
-        # create a new puzzle board
-        self._puzzle_board = [[0 for x in xrange(PUZZLE_WIDTH)]
-                                for y in xrange(PUZZLE_HEIGHT)]
-        self._puzzle_shape = None
-        # TODO add some random elements for higher levels
+        return self._puzzle_board
+
+    @property
+    def puzzle_piece(self):
+        """
+        The (piece, rotation, (x, y) location) of the player puzzle piece,
+        or None if there is no piece in play.
+
+        """
+
+        if self._puzzle_shape:
+            return (self._puzzle_piece,
+                    self._puzzle_rotation,
+                    tuple(self._puzzle_location))
+
+    @property
+    def puzzle_version(self):
+        """
+        A number that goes up each time the board, or the player shape on it,
+        changes.
+
+        """
+
+        self._puzzle_refresh()
+        return self._puzzle_version
+
+    def puzzle_board_rows(self):
+        """
+        Get the board rows with the player shape merged in.
+        The rows are shared with other callers, do not change them.
+
+        """
+
+        self._puzzle_refresh()
+        if self._puzzle_rows is None:
+            board = self._puzzle_board
+            if board is None:
+                rows = []
+            elif self._puzzle_shape:
+                rows = board.merged(self._puzzle_shape, self._puzzle_location)
+            else:
+                rows = board.rows()
+            self._puzzle_rows = rows
+        return self._puzzle_rows
+
+    def puzzle_changes(self, since_version):
+        """
+        Get the list of (x, y, value) cells that changed since the given
+        puzzle version.
+        Returns None if that version is None or too old to compare with,
+        in which case the whole board should be read again.
+
+        """
+
+        version = self.puzzle_version
+        history = self._puzzle_history
+        if (since_version is None or since_version > version or
+                version - since_version > len(history)):
+            return None
+        changed = set()
+        for newer in xrange(since_version + 1, version + 1):
+            cells = history.get(newer, None)
+            if cells is None:
+                return None
+            changed.update(cells)
+        board = self._puzzle_board
+        footprint = self._puzzle_footprint
+        changes = []
+        for index in sorted(changed):
+            y, x = divmod(index, board.width)
+            changes.append((x, y, board.block_at(x, y) + footprint.get(index, 0)))
+        return changes
+
+    def _puzzle_refresh(self):
+        """
+        Count a new puzzle version if anything the merged rows show has
+        changed, and note the cells that did. The rows are built again when
+        next asked for.
+
+        """
+
+        board = self._puzzle_board
+        if board is None:
+            key = None
+        else:
+            key = (board, board.version, self._puzzle_shape,
+                   self._puzzle_location and tuple(self._puzzle_location))
+        if key == self._puzzle_key:
+            return
+        old_board = self._puzzle_key and self._puzzle_key[0]
+        self._puzzle_key = key
+        self._puzzle_version += 1
+        self._puzzle_rows = None
+
+        footprint = {}
+        if board is not None and self._puzzle_shape:
+            x, y = self._puzzle_location
+            for cy, row in enumerate(self._puzzle_shape):
+                for cx, cell in enumerate(row):
+                    if cell:
+                        footprint[(y + cy) * board.width + x + cx] = cell
+        if board is None or board is not old_board:
+            # a new board has no history to compare with
+            self._puzzle_history.clear()
+            if board is not None:
+                board.take_changes()
+        else:
+            changed = board.take_changes()
+            if changed is not None:
+                changed.update(self._puzzle_footprint)
+                changed.update(footprint)
+            self._puzzle_history[self._puzzle_version] = changed
+            if len(self._puzzle_history) > PUZZLE_HISTORY:
+                self._puzzle_history.popitem(last=False)
+        self._puzzle_footprint = footprint
 
-    def _puzzle_merge_board(self, board, shape, shape_location):
+    def _reset_puzzle(self):
         """
-        Merge the shape with the board at location and return the new board.
+        Reset the puzzle game.
 
         """
 
-        clone = self._unshared_copy(board)
-        x, y = shape_location
-        for cy, row in enumerate(shape):
-            for cx, val in enumerate(row):
-                clone[cy + y][cx + x] += val
-        return clone
+        # create a new puzzle board
+        width, height = self.puzzle_size
+        self._puzzle_board = puzzle.make_board(width, height, self.puzzle_engine)
+        self._puzzle_shape = None
+        self._puzzle_piece = None
+        # TODO add some random elements for higher levels
 
     def _puzzle_next_shape(self):
         """
@@ -559,25 +804,24 @@ class MoonModel(object):
         # list of available piece types for the current phase
         piece_types = self._puzzle_allowed_block_types(include_flotsam=True)
         if not piece_types:
-            trace.write('state %s does not have puzzle shapes to choose from' % (self.state,))
+            trace.warning('state %s does not have puzzle shapes to choose from', self.state)
             return
 
-        # choose a shape and center it
-        new_shape = random.choice(TETRIS_SHAPES)
-        self._puzzle_shape = new_shape
-        self._puzzle_location = [int(PUZZLE_WIDTH / 2 - len(new_shape[0])/2), 0]
-
-        # replace each shape element with a game piece
-        for cy, row in enumerate(new_shape):
-            for cx, val in enumerate(row):
-                if val:
-                    new_shape[cy][cx] = random.choice(piece_types)
+        # choose a shape, fill it with game pieces, and center it
+        shape = random.choice(PIECE_CATALOGUE)
+        piece = puzzle.Piece(shape,
+            [random.choice(piece_types) for n in xrange(shape.size)])
+        self._puzzle_piece = piece
+        self._puzzle_rotation = 0
+        self._puzzle_shape = piece.turns[0]
+        self._puzzle_location = [
+            int(self._puzzle_board.width / 2 - len(self._puzzle_shape[0])/2), 0]
 
         # game over if this new piece collides on entry
-        collides = self._puzzle_piece_collides(
-            self._puzzle_board,
+        collides = self._puzzle_board.collides(
             self._puzzle_shape,
-            self._puzzle_location
+            self._puzzle_location,
+            piece.masks[0]
             )
         if collides:
             self.end_game()
@@ -597,14 +841,6 @@ class MoonModel(object):
             pieces = pieces + list(PHASE2_PIECES)
         return pieces
 
-    def _puzzle_in_bounds(self, x, y):
-        """
-        Checks if a point is in playfield boundaries.
-
-        """
-
-        return (x >= 0 and x < PUZZLE_WIDTH and y >= 0 and y < PUZZLE_HEIGHT)
-
     def _puzzle_step(self):
         """
         Update the puzzle, dropping any blocks that are able to.
@@ -632,17 +868,16 @@ class MoonModel(object):
         new_loc = self._puzzle_location[:]
         new_loc[1] += 1
 
-        collides = self._puzzle_piece_collides(
-            self._puzzle_board,
+        collides = self._puzzle_board.collides(
             self._puzzle_shape,
-            new_loc
+            new_loc,
+            self._puzzle_piece.masks[self._puzzle_rotation]
             )
 
         if collides:
 
             # merge the shape into the board
-            self._puzzle_board = self._puzzle_merge_board(
-                self._puzzle_board,
+            self._puzzle_board.merge(
                 self._puzzle_shape,
                 self._puzzle_location)
 
@@ -656,17 +891,15 @@ class MoonModel(object):
 
     def _puzzle_drop_board(self):
         """
-        Drops any floating board pieces down one position.
+        Drops any floating board pieces down one position, or all the way
+        with settle gravity.
 
         """
 
-        for y in xrange(PUZZLE_HEIGHT - 2, -1, -1):
-            for x in xrange(PUZZLE_WIDTH):
-                if y < PUZZLE_HEIGHT - 1:
-                    below = self._puzzle_block_at(x, y + 1)
-                    if not below:
-                        self._puzzle_board[y + 1][x] = self._puzzle_board[y][x]
-                        self._puzzle_board[y][x] = 0
+        if self.puzzle_gravity == puzzle.GRAVITY_SETTLE:
+            self._puzzle_board.settle()
+        else:
+            self._puzzle_board.drop()
 
     def _puzzle_clear_filled_lines(self):
         """
@@ -674,28 +907,9 @@ class MoonModel(object):
 
         """
 
-        for y in xrange(PUZZLE_HEIGHT - 1, -1, -1):
-            if self._puzzle_board[y].count(0) == 0:
-                for x in xrange(PUZZLE_WIDTH):
-                    self._puzzle_board[y][x] = 0
-                self._evman.Post(PuzzleRowCleared(row_number=y))
-                break
-
-    def _puzzle_piece_collides(self, board, shape, offset):
-        """
-        Test if the given shape collides with any solids on the board.
-
-        """
-
-        x, y = offset
-        for cy, row in enumerate(shape):
-            for cx, cell in enumerate(row):
-                try:
-                    if cell and board[cy + y][cx + x]:
-                        return True
-                except IndexError:
-                    return True
-        return False
+        row = self._puzzle_board.clear_filled_line()
+        if row is not None:
+            self._evman.Post(PuzzleRowCleared(row_number=row))
 
     def _puzzle_pair_blocks(self):
         """
@@ -703,55 +917,18 @@ class MoonModel(object):
 
         """
 
-        # for each board value (minus the last column and last row)
+        # for each block that landed or fell since the last step,
+        # and the blocks above and left of it:
         #   get the values to the A) right and B) bottom.
         #   ? are the values different
         #   ? are both in a block pair list
         #   remove them and spawn the combined block in the arcade structure
+        # the pair lists are tried in a random order, all of them each step.
 
         shuffled_pairs = BLOCK_PAIRS.items()
         random.shuffle(shuffled_pairs)
-        for new_block, combo in shuffled_pairs:
-            for x, y, this_block in self.puzzle_board_data(include_player_shape=False):
-                # if this block is a possible combination value
-                if (this_block in combo):
-                    # get the right and bottom neighbors
-                    nx = x + 1
-                    ny = y + 1
-                    xneigh = self._puzzle_block_at(nx, y)
-                    yneigh = self._puzzle_block_at(x, ny)
-                    # match blocks if they are not the same value
-                    # and both exist in the combination list
-                    # match the bottom neighbor
-                    if yneigh != this_block and yneigh in combo:
-                        self._puzzle_clear_cell(x, y)
-                        self._puzzle_clear_cell(x, ny)
-                        self._arcade_build_moonbase(new_block)
-                        # skip the next test
-                        continue
-                    if xneigh != this_block and xneigh in combo:
-                        self._puzzle_clear_cell(x, y)
-                        self._puzzle_clear_cell(nx, y)
-                        self._arcade_build_moonbase(new_block)
-
-    def _puzzle_block_at(self, x, y):
-        """
-        Get the block value at x, y.
-        Returns None if x, y is out of range.
-
-        """
-
-        if self._puzzle_in_bounds(x, y):
-            return self._puzzle_board[y][x]
-
-    def _puzzle_clear_cell(self, x, y):
-        """
-        Clears the board cell at x, y.
-
-        """
-
-        old_value = self._puzzle_board[y][x]
-        self._puzzle_board[y][x] = 0
+        for new_block in self._puzzle_board.pair_blocks(shuffled_pairs):
+            self._arcade_build_moonbase(new_block)
 
     def _puzzle_move_piece(self, delta_x):
         """
@@ -767,10 +944,10 @@ class MoonModel(object):
         if x < 0:
             x = 0
 
-        collides = self._puzzle_piece_collides(
-            self._puzzle_board,
+        collides = self._puzzle_board.collides(
             self._puzzle_shape,
-            [x, y]
+            [x, y],
+            self._puzzle_piece.masks[self._puzzle_rotation]
             )
 
         if not collides:
@@ -783,24 +960,20 @@ class MoonModel(object):
         if not self._puzzle_shape:
             return
 
-        new_shape = self._unshared_copy(self._puzzle_shape)
-
         if clockwise:
-            new_shape = [[new_shape[y][x]
-                        for y in xrange(len(new_shape) - 1, -1, -1)]
-                        for x in xrange(len(new_shape[0]))]
+            new_rotation = (self._puzzle_rotation + 1) % 4
         else:
-            new_shape = [[new_shape[y][x]
-                        for y in xrange(len(new_shape))]
-                        for x in xrange(len(new_shape[0]) - 1, -1, -1)]
+            new_rotation = (self._puzzle_rotation - 1) % 4
+        new_shape = self._puzzle_piece.turns[new_rotation]
 
-        collides = self._puzzle_piece_collides(
-            self._puzzle_board,
+        collides = self._puzzle_board.collides(
             new_shape,
-            self._puzzle_location
+            self._puzzle_location,
+            self._puzzle_piece.masks[new_rotation]
             )
         if not collides:
             self._puzzle_shape = new_shape
+            self._puzzle_rotation = new_rotation
             self._puzzle_print_grid()
 
     def move_left(self):
@@ -836,6 +1009,40 @@ class MoonModel(object):
 
 #-- Arcade Game Logic -- -- -- -- -- -- -- -- -- -- -- -- -- --
 
+    def swarm(self, size=SWARM_SIZE, spawn_rate=SWARM_SPAWN_RATE, cap=SWARM_CAP):
+        """
+        Stress the arcade with a swarm of asteroids from the next game on:
+        a size arcade that spawns spawn_rate asteroids a step, up to cap.
+
+        Arcade movement is posted in ArcadeFrameEvents, and projectiles use
+        the array engine, if numpy is installed.
+
+        """
+
+        self.arcade_size = size
+        self.asteroid_spawn_rate = spawn_rate
+        self.asteroid_cap = cap
+        self.arcade_engine = projectiles.ENGINE_ARRAY
+        self.batch_arcade_events = True
+
+    @property
+    def asteroid_coordinates(self):
+        """
+        The (xs, ys) lists of the asteroid positions in play.
+
+        """
+
+        return self._asteroids.coordinates()
+
+    @property
+    def turrets(self):
+        """
+        A tuple of the moon base turrets, for reading only.
+
+        """
+
+        return tuple(self._moonbase.registry(Turret))
+
     def closest_ready_turret(self, arcade_position):
         """
         Returns the closest, charged turret to a position.
@@ -844,19 +1051,10 @@ class MoonModel(object):
         """
 
         # do not allow targeting positions below the boundary.
-        if (arcade_position[1] >= ARCADE_HEIGHT - ((BASE_HEIGHT + 4) * BLOCK_PADDING)):
+        if (arcade_position[1] >= self._arcade_height - ((BASE_HEIGHT + 4) * BLOCK_PADDING)):
             return
 
-        chosen_one = None
-        chosen_dist = ARCADE_HEIGHT
-        for key, base in self._moonbase.items():
-            if isinstance(base, Turret):
-                if base.ready:
-                    distance = helper.distance(* arcade_position + base.position)
-                    if distance < chosen_dist:
-                        chosen_dist = distance
-                        chosen_one = base
-        return chosen_one
+        return self._moonbase.closest_ready_turret(arcade_position, self._arcade_height)
 
     def fire_missile(self, arcade_position):
         """
@@ -867,13 +1065,32 @@ class MoonModel(object):
 
         turret = self.closest_ready_turret(arcade_position)
         if turret:
-            trace.write('firing solution number %s' % (turret.id,))
-            turret.charge = 0
-            missile = Missile(turret.position, arcade_position)
-            self._missiles.append(missile)
+            trace.debug('firing solution number %s', turret.id)
+            self._moonbase.discharge(turret)
+            missile = self._missiles.spawn(turret.position, arcade_position)
             self._evman.Post(MissileSpawnedEvent(missile))
         else:
-            trace.write('no ready turrets found')
+            trace.debug('no ready turrets found')
+
+    def spawn_asteroid(self, position, destination):
+        """
+        Put an asteroid in play, falling from position to destination.
+
+        """
+
+        asteroid = self._asteroids.spawn(position, destination)
+        self._evman.Post(AsteroidSpawnedEvent(asteroid))
+        return asteroid
+
+    def spawn_explosion(self, position):
+        """
+        Spawn a new impact point that grows its explosion.
+
+        """
+
+        explosion = self._explosions.spawn(position)
+        self._evman.Post(ExplosionSpawnEvent(explosion))
+        return explosion
 
     def _arcade_destroy_all_your_base(self):
         """
@@ -881,19 +1098,13 @@ class MoonModel(object):
 
         """
 
-        remove_list = []
-        for key, base in self._moonbase.items():
-            if isinstance(base, Turret):
-                self._evman.Post(TurretDestroyEvent(base))
-                remove_list.append(base)
-            elif isinstance(base, Radar):
-                self._evman.Post(RadarDestroyEvent(base))
-                remove_list.append(base)
-            elif isinstance(base, Mooncrete):
-                self._evman.Post(MooncreteDestroyEvent(base))
-                remove_list.append(base)
-        for dead_base in remove_list:
-            del self._moonbase[dead_base.position]
+        for base_type, destroy_event in (
+                (Turret, TurretDestroyEvent),
+                (Radar, RadarDestroyEvent),
+                (Mooncrete, MooncreteDestroyEvent)):
+            for base in list(self._moonbase.registry(base_type)):
+                self._evman.Post(destroy_event(base))
+                self._moonbase.remove(base)
 
     def _arcade_clear_bonuses(self):
         """
@@ -920,9 +1131,9 @@ class MoonModel(object):
             self._evman.Post(ExplosionDestroyEvent(explosion))
         for missile in self._missiles:
             self._evman.Post(MissileDestroyEvent(missile))
-        self._asteroids = []
-        self._explosions = []
-        self._missiles = []
+        self._asteroids = projectiles.make_store(Asteroid, self.arcade_engine)
+        self._explosions = projectiles.make_store(Explosion, self.arcade_engine)
+        self._missiles = projectiles.make_store(Missile, self.arcade_engine)
 
         # add some bases for testing
         for n in xrange(5):
@@ -940,8 +1151,8 @@ class MoonModel(object):
 
         # clear remnant asteroids and missiles and explosions
         for asteroid in self._asteroids:
-            self._arcade_spawn_explosion(asteroid.position)
-        self._arcade_remove_asteroids(copy.copy(self._asteroids))
+            self.spawn_explosion(asteroid.position)
+        self._arcade_remove_asteroids(list(self._asteroids))
 
     def _generate_lunar_landscape(self):
         """
@@ -950,14 +1161,16 @@ class MoonModel(object):
         """
 
         self._evman.Post(LunarLandscapeClearedEvent())
-        self._moonbase = {}
+        self._moonbase = moonbase.Moonbase(
+            self._arcade_width, self._arcade_height, BLOCK_PADDING,
+            self._arcade_iterate_moonscape_blocks())
 
         # fill the bottom with LunarLands
-        for x in xrange(0, ARCADE_WIDTH, BLOCK_PADDING):
-            y = ARCADE_HEIGHT - BLOCK_PADDING
+        for x in xrange(0, self._arcade_width, BLOCK_PADDING):
+            y = self._arcade_height - BLOCK_PADDING
             position = (x, y)
             land = LunarLand(position)
-            self._moonbase[position] = land
+            self._moonbase.add(land)
             self._evman.Post(LunarLandSpawnEvent(land))
 
         # for the next n levels up, place some random LunarLands
@@ -973,7 +1186,7 @@ class MoonModel(object):
                 base = self._moonbase.get((x, y + BLOCK_PADDING), None)
                 if not current and base:
                     land = LunarLand(position)
-                    self._moonbase[position] = land
+                    self._moonbase.add(land)
                     self._evman.Post(LunarLandSpawnEvent(land))
 
     def _arcade_iterate_moonscape_blocks(self, n=5):
@@ -992,10 +1205,10 @@ class MoonModel(object):
 
         """
 
-        start = ARCADE_HEIGHT - BLOCK_PADDING
-        end = ARCADE_HEIGHT - (n + 1) * BLOCK_PADDING
+        start = self._arcade_height - BLOCK_PADDING
+        end = self._arcade_height - (n + 1) * BLOCK_PADDING
         for y in xrange(start, end, -BLOCK_PADDING):
-            for x in xrange(0, ARCADE_WIDTH, BLOCK_PADDING):
+            for x in xrange(0, self._arcade_width, BLOCK_PADDING):
                 yield (x, y)
 
     def _arcade_in_bounds(self, position):
@@ -1005,22 +1218,20 @@ class MoonModel(object):
         """
 
         x, y = position
-        return (x >= 0 and x < ARCADE_WIDTH and y >= 0 and y < ARCADE_HEIGHT)
+        return (x >= 0 and x < self._arcade_width and
+                y >= 0 and y < self._arcade_height)
 
     def _moonbase_at(self, position):
         """
         Get the block value at (x, y) position
         or None if the position is empty.
 
-        Since the moon base blocks use padding, we snap the position to
-        the closest padding position.
+        Since the moon base blocks use padding, we look in the grid
+        cell the position falls in.
 
         """
 
-        x, y = position
-        x = int(math.floor(float(x) / BLOCK_PADDING) * BLOCK_PADDING)
-        y = int(math.floor(float(y) / BLOCK_PADDING) * BLOCK_PADDING)
-        return self._moonbase.get((x, y), None)
+        return self._moonbase.at(*position)
 
     def _arcade_build_moonbase(self, block_type):
         """
@@ -1034,48 +1245,39 @@ class MoonModel(object):
         # get the required block we can place this block on
         required_base = BLOCK_BUILD_REQUIREMENTS.get(block_type, None)
         if not required_base:
-            trace.write('Warning: "%s" does not have a BLOCK_BUILD_REQUIREMENTS entry.' %
-                        (BLOCK_NAMES[block_type],))
-
-        # shuffle all possible moon base positions.
-        # go through them until we find an open one where the block below
-        # (the base) is the required block type.
-        home_position = None
-        moonbase_positions = list(self._arcade_iterate_moonscape_blocks())
-        random.shuffle(moonbase_positions)
-        for position in moonbase_positions:
-            current = self._moonbase.get(position, None)
-            base = self._moonbase.get((position[0], position[1] + BLOCK_PADDING), None)
-            if not current and isinstance(base, required_base):
-                home_position = position
-                break
+            trace.warning('"%s" does not have a BLOCK_BUILD_REQUIREMENTS entry.',
+                        BLOCK_NAMES[block_type])
+
+        # pick an open build slot where the block below (the base)
+        # is the required block type.
+        home_position = self._moonbase.random_slot(required_base)
         if not home_position:
-            trace.write('There are no "%s" moon base blocks to place "%s" on' %
-                (required_base, BLOCK_NAMES[block_type]))
+            trace.debug('There are no "%s" moon base blocks to place "%s" on',
+                required_base, BLOCK_NAMES[block_type])
             return
 
         # construct game objects
         if block_type == BLOCK_MOONCRETE_SLAB:
             slab = Mooncrete(home_position)
-            self._moonbase[home_position] = slab
+            self._moonbase.add(slab)
             self._evman.Post(MooncreteSpawnEvent(
                 mooncrete=slab))
         elif block_type == BLOCK_BUILDING:
             self.moonbases_built += 1
             base = Building(home_position)
-            self._moonbase[home_position] = base
+            self._moonbase.add(base)
             self._evman.Post(BuildingSpawnEvent(
                 building=base))
         elif block_type == BLOCK_TURRET:
             self.moonbases_built += 1
             turret = Turret(home_position)
-            self._moonbase[home_position] = turret
+            self._moonbase.add(turret)
             self._evman.Post(TurretSpawnedEvent(
                 turret=turret))
         elif block_type == BLOCK_RADAR:
             self.moonbases_built += 1
             radar = Radar(home_position)
-            self._moonbase[home_position] = radar
+            self._moonbase.add(radar)
             self._evman.Post(RadarSpawnedEvent(
                 radar=radar))
         else:
@@ -1087,18 +1289,16 @@ class MoonModel(object):
 
         """
 
-        turrets_alive = 0
-        for position, base_object in self._moonbase.items():
-            # recharge our gun turrets
-            if isinstance(base_object, Turret):
-                turrets_alive += 1
-                base_object.recharge()
+        # recharge our gun turrets
+        turrets_alive = self._moonbase.recharge_turrets()
 
         if (self.state == STATE_PHASE3):
             self._arcade_spawn_asteroids()
         self._arcade_move_asteroids()
         self._arcade_move_missiles()
         self._arcade_grow_explosions()
+        if self.batch_arcade_events:
+            self._arcade_post_frame()
 
         # test for lose conditions
         if (self._playing):
@@ -1108,9 +1308,9 @@ class MoonModel(object):
             if (self.lose_sequence_explosion_counter > 0):
                 self.lose_sequence_explosion_counter -= 1
                 position = (
-                    random.randint(0, ARCADE_WIDTH),
-                    random.randint(0, ARCADE_HEIGHT))
-                self._arcade_spawn_explosion(position)
+                    random.randint(0, self._arcade_width),
+                    random.randint(0, self._arcade_height))
+                self.spawn_explosion(position)
 
     def _arcade_calculate_score_bonus(self):
         """
@@ -1131,23 +1331,28 @@ class MoonModel(object):
 
         """
 
-        # create n asteroids + level
-        min_asteroids = 6
-        extra_per_level = 1.5
-        total_asteroids = int(min_asteroids + (self.level * extra_per_level))
+        # create n asteroids + level, unless there is a cap
+        total_asteroids = self.asteroid_cap
+        if total_asteroids is None:
+            min_asteroids = 6
+            extra_per_level = 1.5
+            total_asteroids = int(min_asteroids + (self.level * extra_per_level))
+
+        if not self._playing:
+            return
 
         # spawn some asteroids
-        if (self._playing and len(self._asteroids) < total_asteroids):
-            position = (random.randint(0, ARCADE_WIDTH), 0)
-            destination = (random.randint(0, ARCADE_WIDTH), ARCADE_HEIGHT)
+        spawn_count = min(self.asteroid_spawn_rate,
+                          total_asteroids - len(self._asteroids))
+        for n in xrange(spawn_count):
+            position = (random.randint(0, self._arcade_width), 0)
+            destination = (random.randint(0, self._arcade_width), self._arcade_height)
             # let asteroids target base objects directly on higer levels
             if self.level > 1:
                 base_target = self._arcade_get_random_moonbase_target([Turret, Radar, Mooncrete])
                 if base_target:
                     destination = base_target
-            asteroid = Asteroid(position, destination)
-            self._asteroids.append(asteroid)
-            self._evman.Post(AsteroidSpawnedEvent(asteroid))
+            self.spawn_asteroid(position, destination)
 
     def _arcade_get_random_moonbase_target(self, type_list):
         """
@@ -1155,15 +1360,12 @@ class MoonModel(object):
 
         """
 
-        choices = []
-        for key, base in self._moonbase.items():
-            if type(base) in type_list:
-                choices.append(key)
-        if choices:
-            target = random.choice(choices)
+        base = self._moonbase.random_base(type_list)
+        if base:
+            target = base.position
             # center the target by half the padding and ensure it goes beyond
             # the game boundary.
-            return (target[0] + (BLOCK_PADDING / 2), ARCADE_HEIGHT)
+            return (target[0] + (BLOCK_PADDING / 2), self._arcade_height)
 
     def _arcade_move_asteroids(self):
         """
@@ -1171,21 +1373,27 @@ class MoonModel(object):
 
         """
 
-        # we cannot modify the asteroid list while iterating it.
+        # we cannot modify the asteroid store while iterating it.
         # keep track of those to remove after our loop is done.
         remove_list = []
-        for asteroid in self._asteroids:
-
-            # move asteroids
-            asteroid.move()
-            self._evman.Post(AsteroidMovedEvent(asteroid))
-
-            if not self._arcade_in_bounds(asteroid.position):
+        asteroids = self._asteroids
+        asteroids.move()
+        if not self.batch_arcade_events:
+            for asteroid in asteroids:
+                self._evman.Post(AsteroidMovedEvent.acquire(asteroid))
+
+        xs, ys = asteroids.coordinates()
+        width = self._arcade_width
+        height = self._arcade_height
+        skyline = self._moonbase.skyline
+        for slot, x, y in itertools.izip(itertools.count(), xs, ys):
+            if not (0 <= x < width and 0 <= y < height):
                 # the asteroid is out of the game boundaries
-                remove_list.append(asteroid)
-            else:
-                if self._arcade_destroy_base_at(asteroid.position):
-                    remove_list.append(asteroid)
+                remove_list.append(asteroids[slot])
+            elif y >= skyline[x // BLOCK_PADDING]:
+                # the asteroid is down among the base, look closer
+                if self._arcade_destroy_base_at((x, y)):
+                    remove_list.append(asteroids[slot])
 
         self._arcade_remove_asteroids(remove_list)
 
@@ -1194,48 +1402,38 @@ class MoonModel(object):
         Destroy the base structure at a position.
 
         If it is a mooncrete object, it will also destroy anything
-        built on top of it.
+        built on top of it, and so on up.
 
         Returns True if something got hit.
 
         """
 
-        # get any moon base object at this position
-        base_object = self._moonbase_at(position)
-
-        if base_object:
+        x, y = position
+        hit = False
+        while True:
+            # get the type of any moon base object at this position
+            code = self._moonbase.code_at(x, y)
 
             # check for asteroid + moonbase collisions
-            if isinstance(base_object, LunarLand):
+            if code == moonbase.BASE_EMPTY:
+                return hit
+
+            elif code == moonbase.BASE_LAND:
                 # we hit the ground and disintegrate in a puff of dust
                 return True
 
-            elif isinstance(base_object, Mooncrete):
-                # we hit a mooncrete slab. destroy both items.
-                del self._moonbase[base_object.position]
+            base_object = self._moonbase.at(x, y)
+            self._moonbase.remove(base_object)
+            if code == moonbase.BASE_MOONCRETE:
+                # we hit a mooncrete slab. destroy both items, and
+                # whatever was built on it.
                 self._evman.Post(MooncreteDestroyEvent(base_object))
-                self._arcade_destroy_base_at((position[0], position[1] - BLOCK_PADDING))
-                return True
-
-            elif isinstance(base_object, Building):
-                # we hit a moon base building. destroy both.
-                self.moonbases_destroyed += 1
-                del self._moonbase[base_object.position]
-                self._evman.Post(BuildingDestroyEvent(base_object))
-                return True
-
-            elif isinstance(base_object, Turret):
-                # we hit a gun turret. destroy both items.
-                self.moonbases_destroyed += 1
-                del self._moonbase[base_object.position]
-                self._evman.Post(TurretDestroyEvent(base_object))
-                return True
-
-            elif isinstance(base_object, Radar):
-                # we hit a radar dish. destroy both.
+                hit = True
+                y -= BLOCK_PADDING
+            else:
+                # we hit a building, gun turret or radar dish. destroy both.
                 self.moonbases_destroyed += 1
-                del self._moonbase[base_object.position]
-                self._evman.Post(RadarDestroyEvent(base_object))
+                self._evman.Post(BASE_DESTROY_EVENTS[code](base_object))
                 return True
 
     def _arcade_remove_asteroids(self, asteroid_list):
@@ -1245,11 +1443,8 @@ class MoonModel(object):
         """
 
         for asteroid in asteroid_list:
-            try:
-                self._asteroids.remove(asteroid)
+            if self._asteroids.remove(asteroid):
                 self._evman.Post(AsteroidDestroyEvent(asteroid))
-            except ValueError:
-                pass
 
     def _arcade_move_missiles(self):
         """
@@ -1258,16 +1453,18 @@ class MoonModel(object):
         """
 
         remove_list = []
-        for missile in self._missiles:
-            if missile.move():
-                self._evman.Post(MissileMovedEvent(missile))
+        moved = self._missiles.move()
+        for missile, flying in zip(self._missiles, moved):
+            if flying:
+                if not self.batch_arcade_events:
+                    self._evman.Post(MissileMovedEvent.acquire(missile))
             else:
-                self._arcade_spawn_explosion(missile.position)
+                self.spawn_explosion(missile.position)
                 remove_list.append(missile)
 
         for missile in remove_list:
-            self._missiles.remove(missile)
-            self._evman.Post(MissileDestroyEvent(missile))
+            if self._missiles.remove(missile):
+                self._evman.Post(MissileDestroyEvent(missile))
 
     def _arcade_grow_explosions(self):
         """
@@ -1278,34 +1475,55 @@ class MoonModel(object):
         explosion_remove_list = []
         asteroid_remove_list = []
         new_explosions = []
-        for explosion in self._explosions:
-            if explosion.update():
-                self._evman.Post(ExplosionGrowEvent(explosion))
-                # check for collisions with asteroids
-                for asteroid in self._asteroids:
-                    if asteroid.y > ASTEROID_SAFE_ZONE:
-                        dist = helper.distance(* asteroid.position + explosion.position)
-                        if (dist < explosion.radius * 4):
-                            self.asteroids_destroyed += 1
-                            asteroid_remove_list.append(asteroid)
-                            new_explosions.append(asteroid)
+        asteroids = self._asteroids
+        grid = self._asteroid_grid
+        grid.clear()
+        if len(self._explosions):
+            xs, ys = asteroids.coordinates()
+            grid.fill(xs, ys, self._asteroid_safe_zone)
+
+        explosions = self._explosions
+        grown = explosions.grow()
+        us, vs = explosions.coordinates()
+        radii = explosions.radii()
+        for explosion, grew, u, v, radius in itertools.izip(
+                explosions, grown, us, vs, radii):
+            if grew:
+                if not self.batch_arcade_events:
+                    self._evman.Post(ExplosionGrowEvent.acquire(explosion))
+                # check for collisions with the asteroids near by
+                reach = radius * 4
+                reach_squared = reach * reach
+                for slot in grid.near(u, v, reach):
+                    if (xs[slot] - u) ** 2 + (ys[slot] - v) ** 2 < reach_squared:
+                        asteroid = asteroids[slot]
+                        self.asteroids_destroyed += 1
+                        asteroid_remove_list.append(asteroid)
+                        new_explosions.append(asteroid)
             else:
                 explosion_remove_list.append(explosion)
 
         self._arcade_remove_asteroids(asteroid_remove_list)
 
         for explosion in explosion_remove_list:
-            self._explosions.remove(explosion)
-            self._evman.Post(ExplosionDestroyEvent(explosion))
+            if self._explosions.remove(explosion):
+                self._evman.Post(ExplosionDestroyEvent(explosion))
         for asteroid in new_explosions:
-            self._arcade_spawn_explosion(asteroid.position)
+            self.spawn_explosion(asteroid.position)
 
-    def _arcade_spawn_explosion(self, position):
+    def _arcade_post_frame(self):
         """
-        Spawn a new impact point that grows its explosion.
+        Post the positions of all asteroids and missiles, and the radii of
+        all explosions, in a single ArcadeFrameEvent.
 
         """
 
-        explosion = Explosion(position)
-        self._explosions.append(explosion)
-        self._evman.Post(ExplosionSpawnEvent(explosion))
+        self._evman.Post(ArcadeFrameEvent(
+            asteroid_ids=self._asteroids.ids(),
+            asteroid_positions=self._asteroids.positions(),
+            missile_ids=self._missiles.ids(),
+            missile_positions=self._missiles.positions(),
+            explosion_ids=self._explosions.ids(),
+            explosion_radii=self._explosions.radii(),
+            ))
+
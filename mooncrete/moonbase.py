@@ -0,0 +1,372 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+# Moon base storage
+#
+# The model keeps the lunar landscape and everything built on it in a
+# Moonbase. It is a grid of padding sized cells, each holding the type code
+# of the base object in it and the object itself. Any point of the arcade is
+# looked up by its cell, (x // padding, y // padding), with integer
+# arithmetic.
+#
+# The skyline has the top y of the highest cell taken in each column, so
+# anything above it can be told it hit nothing with a single comparison:
+#
+#   y >= skyline[x // padding]
+#
+# It also keeps a registry of the bases of each type, so the game can visit
+# or pick from the turrets, radars or mooncrete without looking at the
+# whole base.
+#
+# The turrets that are ready to fire are kept in order of position, x
+# first. Turret charge must be changed through recharge_turrets() and
+# discharge() so this stays right.
+#
+# It also knows the open build slots: the empty positions in the build area
+# that sit on top of another base object. These are grouped by the type of
+# the object below, which decides what can be built there, see the model
+# BLOCK_BUILD_REQUIREMENTS.
+
+
+import bisect
+import random
+from array import array
+import helper
+from gameObjects import *
+
+
+# base object type codes in the grid
+BASE_EMPTY = 0
+BASE_LAND = 1
+BASE_MOONCRETE = 2
+BASE_BUILDING = 3
+BASE_TURRET = 4
+BASE_RADAR = 5
+
+# {base type: type code}
+BASE_CODES = {
+    LunarLand: BASE_LAND,
+    Mooncrete: BASE_MOONCRETE,
+    Building: BASE_BUILDING,
+    Turret: BASE_TURRET,
+    Radar: BASE_RADAR,
+    }
+
+
+class Registry(object):
+    """
+    A set of bases or positions, in no particular order, that can pick
+    a random member at once.
+
+    """
+
+    def __init__(self):
+        self.members = []
+        # {member: index in members}
+        self._index = {}
+
+    def __len__(self):
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __contains__(self, member):
+        return member in self._index
+
+    def add(self, member):
+        self._index[member] = len(self.members)
+        self.members.append(member)
+
+    def remove(self, member):
+        """
+        Remove a member, moving the last member into its place.
+
+        """
+
+        index = self._index.pop(member)
+        last = self.members.pop()
+        if index < len(self.members):
+            self.members[index] = last
+            self._index[last] = index
+
+    def discard(self, member):
+        if member in self._index:
+            self.remove(member)
+
+    def pick(self):
+        """
+        Returns a random member, or None if there are none.
+
+        """
+
+        if self.members:
+            return random.choice(self.members)
+
+
+class Moonbase(object):
+    """
+    The moon base objects in a width by height grid of padding sized
+    cells, with a registry of each type.
+
+    Objects sit at the top left of their cell, and can be built on the
+    build_positions.
+
+    """
+
+    def __init__(self, width, height, padding, build_positions):
+        self.padding = padding
+        self.columns = -(-width // padding)
+        self.rows = -(-height // padding)
+        self._build_area = set(build_positions)
+        # the type code and object in each cell, row after row
+        self._codes = array('B', [BASE_EMPTY]) * (self.columns * self.rows)
+        self._cells = [None] * (self.columns * self.rows)
+        self._count = 0
+        # the top y of the highest cell taken in each column, or
+        # rows * padding for empty columns
+        self.skyline = array('i', [self.rows * padding]) * self.columns
+        # {base type: Registry}
+        self._registries = {}
+        # {base type: Registry of the open positions on top of that type}
+        self._slots = {}
+        # sorted positions of the turrets that are ready
+        self._ready = []
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, position):
+        return self.get(position) is not None
+
+    def _cell(self, x, y):
+        """
+        Get the index of the cell at x, y, or None outside the grid.
+
+        """
+
+        column = int(x // self.padding)
+        row = int(y // self.padding)
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return row * self.columns + column
+
+    def code_at(self, x, y):
+        """
+        Get the type code of the base object in the cell at x, y.
+
+        """
+
+        cell = self._cell(x, y)
+        if cell is None:
+            return BASE_EMPTY
+        return self._codes[cell]
+
+    def at(self, x, y):
+        """
+        Get the base object in the cell at x, y, or None.
+
+        """
+
+        cell = self._cell(x, y)
+        if cell is not None:
+            return self._cells[cell]
+
+    def get(self, position, default=None):
+        """
+        Get the base object at exactly position, or default.
+
+        """
+
+        base = self.at(*position)
+        if base is None or base.position != position:
+            return default
+        return base
+
+    def values(self):
+        return [base for base in self._cells if base is not None]
+
+    def items(self):
+        return [(base.position, base) for base in self._cells if base is not None]
+
+    def registry(self, base_type):
+        """
+        Get the Registry of a base type.
+
+        """
+
+        registry = self._registries.get(base_type, None)
+        if registry is None:
+            registry = self._registries[base_type] = Registry()
+        return registry
+
+    def slots(self, base_type):
+        """
+        Get the Registry of the open build slots on top of a base type.
+
+        """
+
+        slots = self._slots.get(base_type, None)
+        if slots is None:
+            slots = self._slots[base_type] = Registry()
+        return slots
+
+    def random_slot(self, base_type):
+        """
+        Returns a random open build slot on top of a base type, or None.
+
+        """
+
+        return self.slots(base_type).pick()
+
+    def add(self, base):
+        """
+        Put a base object at its position.
+
+        """
+
+        x, y = position = base.position
+        below = self.get((x, y + self.padding))
+        if below is not None:
+            self.slots(type(below)).discard(position)
+        cell = self._cell(x, y)
+        self._codes[cell] = BASE_CODES[type(base)]
+        self._cells[cell] = base
+        self._count += 1
+        column = cell % self.columns
+        top = cell // self.columns * self.padding
+        if top < self.skyline[column]:
+            self.skyline[column] = top
+        self.registry(type(base)).add(base)
+        if isinstance(base, Turret) and base.ready:
+            bisect.insort(self._ready, position)
+        self._open((x, y - self.padding))
+
+    def remove(self, base):
+        """
+        Take a base object away.
+
+        """
+
+        x, y = position = base.position
+        cell = self._cell(x, y)
+        self._codes[cell] = BASE_EMPTY
+        self._cells[cell] = None
+        self._count -= 1
+        column = cell % self.columns
+        if cell // self.columns * self.padding == self.skyline[column]:
+            self._lower_skyline(column, cell)
+        self.registry(type(base)).remove(base)
+        if isinstance(base, Turret) and base.ready:
+            self._unready(base)
+        self.slots(type(base)).discard((x, y - self.padding))
+        self._open(position)
+
+    def _lower_skyline(self, column, cell):
+        """
+        Move the skyline of a column down to the next cell taken below
+        the emptied cell.
+
+        """
+
+        codes = self._codes
+        for cell in xrange(cell + self.columns, len(codes), self.columns):
+            if codes[cell] != BASE_EMPTY:
+                self.skyline[column] = cell // self.columns * self.padding
+                return
+        self.skyline[column] = self.rows * self.padding
+
+    def _open(self, position):
+        """
+        Note an empty build position on top of something as a build slot.
+
+        """
+
+        if position in self._build_area and position not in self:
+            below = self.get((position[0], position[1] + self.padding))
+            if below is not None:
+                self.slots(type(below)).add(position)
+
+    def _unready(self, turret):
+        index = bisect.bisect_left(self._ready, turret.position)
+        del self._ready[index]
+
+    def recharge_turrets(self):
+        """
+        Recharge every turret a step.
+        Returns the number of turrets.
+
+        """
+
+        turrets = self.registry(Turret)
+        for turret in turrets:
+            if not turret.ready:
+                turret.recharge()
+                if turret.ready:
+                    bisect.insort(self._ready, turret.position)
+        return len(turrets)
+
+    def discharge(self, turret):
+        """
+        Empty the charge of a turret that fired.
+
+        """
+
+        if turret.ready:
+            self._unready(turret)
+        turret.charge = 0
+
+    def closest_ready_turret(self, position, within):
+        """
+        Returns the ready turret closest to a position, if it is
+        closer than within.
+
+        """
+
+        x = position[0]
+        ready = self._ready
+        chosen_one = None
+        chosen_dist = within
+        # look outward from x, until the turrets are further across
+        # than the closest one found.
+        right = bisect.bisect_left(ready, (x,))
+        left = right - 1
+        while right < len(ready) and ready[right][0] - x < chosen_dist:
+            distance = helper.distance(*position + ready[right])
+            if distance < chosen_dist:
+                chosen_dist = distance
+                chosen_one = ready[right]
+            right += 1
+        while left >= 0 and x - ready[left][0] < chosen_dist:
+            distance = helper.distance(*position + ready[left])
+            if distance < chosen_dist:
+                chosen_dist = distance
+                chosen_one = ready[left]
+            left -= 1
+        if chosen_one:
+            return self.get(chosen_one)
+
+    def random_base(self, base_types):
+        """
+        Returns a random base object of the given types, or None.
+
+        """
+
+        total = sum(len(self.registry(base_type)) for base_type in base_types)
+        if not total:
+            return None
+        pick = random.randrange(total)
+        for base_type in base_types:
+            registry = self.registry(base_type)
+            if pick < len(registry):
+                return registry.members[pick]
+            pick -= len(registry)
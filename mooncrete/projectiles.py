@@ -0,0 +1,382 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+# Projectile stores
+#
+# The model keeps its asteroids, missiles and explosions in one of these
+# stores each. They all behave the same: the list store keeps the game
+# objects, which move and grow themselves, and the array store keeps the
+# state of every projectile in numpy arrays, one array per value, and
+# moves or grows them all at once.
+#
+# Things in a store are packed in slots 0 to len(store) - 1, which is also
+# the order they are iterated in. Removing a thing moves the last one into
+# its slot, so removing is quick but does not keep the order.
+#
+# The array store hands out Projectile handles, which read their state from
+# the arrays, so events can carry them like the game objects. A removed
+# handle keeps the position and radius it had.
+#
+# Every thing spawned gets a new id from a counter shared by all stores,
+# so ids are never reused the way python ids of freed objects are, and
+# sprites and tapes can key on them.
+#
+# Asteroids and missiles follow the points of helper.get_line_segments(),
+# found one at a time from a helper.line_walk() of their line.
+
+
+from array import array
+from itertools import count
+import trace
+import helper
+from gameObjects import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# store engine names for make_store()
+ENGINE_LIST = 'list'
+ENGINE_ARRAY = 'array'
+
+# the array store columns, (name, numpy type name)
+COLUMNS = (
+    # position
+    ('x', 'int64'),
+    ('y', 'int64'),
+    # the line walk, see helper.line_walk
+    ('x1', 'int64'),
+    ('y1', 'int64'),
+    ('deltax', 'int64'),
+    ('deltay', 'int64'),
+    ('error', 'int64'),
+    ('ystep', 'int64'),
+    ('steep', 'bool'),
+    # walk the line points from the far end
+    ('back', 'bool'),
+    # the next line point, the number of points and points per step
+    ('cursor', 'int64'),
+    ('length', 'int64'),
+    ('stride', 'int64'),
+    ('radius', 'float64'),
+    )
+
+
+def make_store(kind, engine=ENGINE_LIST):
+    """
+    Create an empty store of kind things using the named engine, see model.ARCADE_ENGINE.
+
+    """
+
+    if engine == ENGINE_ARRAY:
+        if numpy is not None:
+            return ArrayStore(kind)
+        trace.warning('numpy is not installed, using the list projectile store')
+    return ListStore(kind)
+
+
+class Store(object):
+    """
+    What the store engines have in common: the things in their slots,
+    and removing them.
+
+    Engines keep the state of their slots with _forget() and _copy().
+
+    """
+
+    # ids for spawned things, shared by every store
+    _ids = count(1)
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.handles = []
+
+    def __len__(self):
+        return len(self.handles)
+
+    def __iter__(self):
+        return iter(self.handles)
+
+    def __getitem__(self, slot):
+        return self.handles[slot]
+
+    def remove(self, thing):
+        """
+        Remove a thing, moving the last thing into its slot.
+        Returns False if it is not in the store.
+
+        """
+
+        slot = getattr(thing, 'slot', None)
+        if slot is None or slot >= len(self.handles) or self.handles[slot] is not thing:
+            return False
+        self._forget(slot)
+        last = len(self.handles) - 1
+        if slot != last:
+            moved = self.handles[last]
+            self.handles[slot] = moved
+            moved.slot = slot
+            self._copy(last, slot)
+        self.handles.pop()
+        thing.slot = None
+        return True
+
+    def ids(self):
+        return tuple(thing.id for thing in self.handles)
+
+    def _forget(self, slot):
+        pass
+
+    def _copy(self, source, slot):
+        pass
+
+
+class ListStore(Store):
+    """
+    Keeps game objects in a list, each moves and grows itself.
+
+    """
+
+    def spawn(self, position, destination=None, speed=None):
+        """
+        Put a new thing in play.
+        Asteroids and missiles move speed line points a step, or the
+        speed of their kind if not given.
+
+        """
+
+        if self.kind is Explosion:
+            thing = Explosion(position)
+        elif speed is None:
+            thing = self.kind(position, destination)
+        else:
+            thing = self.kind(position, destination, speed)
+        thing.id = next(Store._ids)
+        thing.slot = len(self.handles)
+        self.handles.append(thing)
+        return thing
+
+    def move(self):
+        """
+        Move everything a step.
+        Returns a list of flags, True for things that moved.
+
+        """
+
+        return [bool(thing.move()) for thing in self.handles]
+
+    def grow(self):
+        """
+        Grow everything a step.
+        Returns a list of flags, True for things that grew.
+
+        """
+
+        return [bool(thing.update()) for thing in self.handles]
+
+    def coordinates(self):
+        """
+        Returns the lists of x and y positions, in slot order.
+
+        """
+
+        xs = [thing.position[0] for thing in self.handles]
+        ys = [thing.position[1] for thing in self.handles]
+        return xs, ys
+
+    def positions(self):
+        """
+        Returns an array of x, y pairs, in slot order.
+
+        """
+
+        positions = array('d')
+        for thing in self.handles:
+            positions.extend(thing.position)
+        return positions
+
+    def radii(self):
+        return array('d', [thing.radius for thing in self.handles])
+
+
+class Projectile(object):
+    """
+    Stands for an asteroid, missile or explosion in an ArrayStore.
+
+    """
+
+    __slots__ = ('id', 'store', 'slot', 'destination', '_position', '_radius')
+
+    def __init__(self, store, slot, destination):
+        self.id = next(Store._ids)
+        self.store = store
+        self.slot = slot
+        self.destination = destination
+        self._position = None
+        self._radius = 0.0
+
+    @property
+    def position(self):
+        if self.slot is None:
+            return self._position
+        return (int(self.store.x[self.slot]), int(self.store.y[self.slot]))
+
+    @property
+    def radius(self):
+        if self.slot is None:
+            return self._radius
+        return float(self.store.radius[self.slot])
+
+    @property
+    def x(self):
+        return self.position[0]
+
+    @property
+    def y(self):
+        return self.position[1]
+
+
+class ArrayStore(Store):
+    """
+    Keeps the projectile state in numpy arrays, which grow as needed, and
+    hands out Projectile handles.
+
+    """
+
+    def __init__(self, kind, capacity=64):
+        Store.__init__(self, kind)
+        self._capacity = capacity
+        for name, dtype in COLUMNS:
+            setattr(self, name, numpy.zeros(capacity, dtype))
+
+    def _grow(self):
+        size = self._capacity
+        self._capacity *= 2
+        for name, dtype in COLUMNS:
+            column = numpy.zeros(self._capacity, dtype)
+            column[:size] = getattr(self, name)
+            setattr(self, name, column)
+
+    def _forget(self, slot):
+        thing = self.handles[slot]
+        thing._position = (int(self.x[slot]), int(self.y[slot]))
+        thing._radius = float(self.radius[slot])
+
+    def _copy(self, source, slot):
+        for name, dtype in COLUMNS:
+            column = getattr(self, name)
+            column[slot] = column[source]
+
+    def spawn(self, position, destination=None, speed=None):
+        """
+        Put a new thing in play.
+        Asteroids and missiles move speed line points a step, or the
+        speed of their kind if not given.
+
+        """
+
+        slot = len(self.handles)
+        if slot == self._capacity:
+            self._grow()
+        thing = Projectile(self, slot, destination)
+        self.handles.append(thing)
+        self.x[slot], self.y[slot] = position
+        self.radius[slot] = 0.0
+        self.cursor[slot] = 0
+        self.length[slot] = 0
+        if destination is not None:
+            # missiles walk their line from the far end, see Missile
+            if self.kind is Missile:
+                walk = helper.line_walk(destination, position)
+                stride = speed or MISSILE_SPEED
+            else:
+                walk = helper.line_walk(position, destination)
+                stride = speed or ASTEROID_SPEED
+            x1, y1, deltax, deltay, error, ystep, steep, rev = walk
+            self.x1[slot] = x1
+            self.y1[slot] = y1
+            self.deltax[slot] = deltax
+            self.deltay[slot] = deltay
+            self.error[slot] = error
+            self.ystep[slot] = ystep
+            self.steep[slot] = steep
+            self.back[slot] = rev != (self.kind is Missile)
+            self.length[slot] = deltax + 1
+            self.stride[slot] = stride
+        return thing
+
+    def move(self):
+        """
+        Move everything a step along its line.
+        Returns an array of flags, True for things that moved.
+
+        """
+
+        count = len(self.handles)
+        moved = self.cursor[:count] < self.length[:count]
+        rows = moved.nonzero()[0]
+        if len(rows):
+            # see helper.line_point
+            deltax = self.deltax[rows]
+            n = self.cursor[rows]
+            n = numpy.where(self.back[rows], deltax - n, n)
+            y = self.y1[rows] + self.ystep[rows] * -(
+                (self.error[rows] - n * self.deltay[rows]) // numpy.maximum(deltax, 1))
+            x = self.x1[rows] + n
+            steep = self.steep[rows]
+            self.x[rows] = numpy.where(steep, y, x)
+            self.y[rows] = numpy.where(steep, x, y)
+            self.cursor[rows] += self.stride[rows]
+        return moved
+
+    def grow(self):
+        """
+        Grow everything a step.
+        Returns an array of flags, True for things that grew.
+
+        """
+
+        radius = self.radius[:len(self.handles)]
+        grew = radius < EXPLOSION_RADIUS
+        radius[grew] += EXPLOSION_GROWTH
+        return grew
+
+    def coordinates(self):
+        """
+        Returns the lists of x and y positions, in slot order.
+
+        """
+
+        count = len(self.handles)
+        return self.x[:count].tolist(), self.y[:count].tolist()
+
+    def positions(self):
+        """
+        Returns an array of x, y pairs, in slot order.
+
+        """
+
+        count = len(self.handles)
+        pairs = numpy.empty(count * 2, 'float64')
+        pairs[0::2] = self.x[:count]
+        pairs[1::2] = self.y[:count]
+        positions = array('d')
+        positions.fromstring(pairs.tostring())
+        return positions
+
+    def radii(self):
+        radii = array('d')
+        radii.fromstring(self.radius[:len(self.handles)].tostring())
+        return radii
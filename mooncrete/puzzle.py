@@ -0,0 +1,840 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+# Puzzle board engines
+#
+# The model keeps its puzzle board in one of these. They all behave the
+# same, the list board is plain python and the array board keeps the cells
+# in a numpy array and works on whole rows and columns at a time.
+#
+# Cells are indexed with (x, y) from the top left. Each value is either 0
+# (no block) or one of the model BLOCK_ constants.
+#
+# Puzzle shapes are lists of rows, as described in the model.
+#
+# Collisions are tested against an occupancy mask of each board row, an
+# integer with bit x set if cell x is taken. The masks have WALL set bits
+# to the left of the board, all bits set to the right of it, and FLOOR
+# rows of set bits below it. A shape mask shifted to its place on a row
+# collides if it shares any bit with the row, walls and floor included.
+#
+# Blocks only pair with a new neighbor: pairing leaves no pairs on the
+# board, and clearing cells never makes new ones. So the boards remember
+# the cells next to blocks that were placed or fell since the last pairing,
+# and pair_blocks() only looks at those.
+#
+# For gravity each column keeps the height of its settled stack, the blocks
+# resting on the bottom with no gaps, and the row of its highest block.
+# Any block above the stack is floating. drop() moves the floating blocks
+# of each column down one row a step, settle() drops them onto the stack
+# at once. Both only visit the columns that have floating blocks.
+
+
+import trace
+import binascii
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# board engine names for make_board()
+ENGINE_LIST = 'list'
+ENGINE_ARRAY = 'array'
+
+# columns of wall left of the board in occupancy masks, so shapes can be
+# tested a little past the left edge.
+WALL = 4
+
+# rows of floor below the board in occupancy masks.
+FLOOR = 4
+
+# gravity modes for the model: drop() or settle() the board each step.
+GRAVITY_STEPPED = 'stepped'
+GRAVITY_SETTLE = 'settle'
+
+# the part of the board cells that may change between take_changes() calls
+# before the board stops listing them, and reports a change of everything.
+CHANGE_LIMIT = 0.25
+
+
+def rotate(shape, clockwise=True):
+    """
+    Get a rotated copy of a shape.
+
+    """
+
+    if clockwise:
+        return [[shape[y][x]
+                for y in xrange(len(shape) - 1, -1, -1)]
+                for x in xrange(len(shape[0]))]
+    else:
+        return [[shape[y][x]
+                for y in xrange(len(shape))]
+                for x in xrange(len(shape[0]) - 1, -1, -1)]
+
+
+def rotations(shape):
+    """
+    Get the four clockwise rotations of a shape, starting with itself.
+
+    """
+
+    turns = [shape]
+    for n in xrange(3):
+        turns.append(rotate(turns[-1]))
+    return turns
+
+
+def shape_mask(shape):
+    """
+    Get a tuple of row masks for a shape, bit x set for each solid cell x.
+
+    """
+
+    return tuple(
+        sum(1 << x for x, cell in enumerate(row) if cell)
+        for row in shape)
+
+
+def catalogue(templates):
+    """
+    Build the piece catalogue: a PieceShape for each template shape.
+
+    """
+
+    return tuple(PieceShape(template) for template in templates)
+
+
+class PieceShape(object):
+    """
+    A template shape of the piece catalogue, in all four rotations.
+
+    The rotations hold slot numbers instead of block values: 0 for an empty
+    cell, n for the nth solid cell of the template counting left to right,
+    top to bottom. A Piece dealt from this shape puts a block in each slot.
+
+    Everything is stored in tuples, the catalogue is shared and never changes.
+
+    """
+
+    def __init__(self, template):
+        slots = []
+        size = 0
+        for row in template:
+            slot_row = []
+            for cell in row:
+                if cell:
+                    size += 1
+                    slot_row.append(size)
+                else:
+                    slot_row.append(0)
+            slots.append(slot_row)
+        self.size = size
+        self.rotations = tuple(
+            tuple(tuple(row) for row in turn) for turn in rotations(slots))
+        self.masks = tuple(shape_mask(turn) for turn in self.rotations)
+
+
+class Piece(object):
+    """
+    A piece dealt from the catalogue, with its blocks in all four rotations.
+    Rotating a piece only means picking another index of turns and masks.
+
+    """
+
+    def __init__(self, shape, blocks):
+        self.shape = shape
+        self.blocks = tuple(blocks)
+        values = (0,) + self.blocks
+        self.turns = tuple(
+            tuple(tuple(values[slot] for slot in row) for row in turn)
+            for turn in shape.rotations)
+        self.masks = shape.masks
+
+
+def make_board(width, height, engine=ENGINE_LIST):
+    """
+    Create an empty board using the named engine, see model.PUZZLE_ENGINE.
+
+    """
+
+    if engine == ENGINE_ARRAY:
+        if numpy is not None:
+            return ArrayBoard(width, height)
+        trace.warning('numpy is not installed, using the list puzzle board')
+    return ListBoard(width, height)
+
+
+class Board(object):
+    """
+    What the board engines have in common: bounds and collision tests,
+    gravity, line clearing and pairing.
+
+    The occupancy masks and columns are kept up to date by the engines as
+    cells change, through _placed(), _vacate() and _cleared_row().
+    Engines read and write the cells of a column with _column() and
+    _set_column().
+
+    The version goes up each time any cell changes, and the changed cells
+    are listed for take_changes().
+
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.version = 0
+        # the occupancy mask bits of board cells, and of an empty row
+        self._board_bits = ((1 << width) - 1) << WALL
+        self._walls = ((1 << WALL) - 1) | (-1 << (width + WALL))
+        self._occupancy = [self._walls] * height + [-1] * FLOOR
+        # y * width + x indexes of blocks that may pair
+        self._candidates = set()
+        # per column: settled stack height, row of the highest block
+        # (height when empty), and the columns with floating blocks.
+        self._heights = [0] * width
+        self._tops = [height] * width
+        self._floating = set()
+        # y * width + x indexes of the cells changed since take_changes(),
+        # or None when there are too many
+        self._changed = set()
+        self._change_limit = int(width * height * CHANGE_LIMIT)
+
+    def take_changes(self):
+        """
+        Get the set of y * width + x indexes of the cells that changed since
+        the last call, or None if too many changed to list.
+
+        """
+
+        changed = self._changed
+        self._changed = set()
+        return changed
+
+    def _note_changes(self, indexes):
+        changed = self._changed
+        if changed is not None:
+            changed.update(indexes)
+            if len(changed) > self._change_limit:
+                self._changed = None
+
+    def in_bounds(self, x, y):
+        return (x >= 0 and x < self.width and y >= 0 and y < self.height)
+
+    def occupancy(self):
+        """
+        Get the occupancy masks of the board rows, with walls and floor.
+
+        """
+
+        return self._occupancy
+
+    def blocks(self):
+        """
+        Yields (x, y, value) for each block on the board, skipping empty cells.
+
+        """
+
+        board_bits = self._board_bits
+        block_at = self.block_at
+        for y in xrange(self.height):
+            bits = self._occupancy[y] & board_bits
+            while bits:
+                low = bits & -bits
+                x = low.bit_length() - 1 - WALL
+                yield (x, y, block_at(x, y))
+                bits ^= low
+
+    def collides(self, shape, offset, mask=None):
+        """
+        Test if the shape at offset overlaps any blocks on the board,
+        or lies outside of it.
+        Pass the shape_mask() of the shape as mask to skip building it.
+
+        """
+
+        if mask is None:
+            mask = shape_mask(shape)
+        rows = self._occupancy
+        x, y = offset
+        shift = x + WALL
+        if shift < 0 or y < 0:
+            return True
+        for bits in mask:
+            if (bits << shift) & rows[y]:
+                return True
+            y += 1
+        return False
+
+    def drop(self):
+        """
+        Drops any floating board pieces down one position.
+
+        """
+
+        if not self._floating:
+            return
+        self.version += 1
+        height = self.height
+        for x in sorted(self._floating):
+            top = self._tops[x]
+            # the empty cell on top of the stack
+            gap = height - self._heights[x] - 1
+            self._write_column(x, top, [0] + self._column(x, top, gap))
+            self._tops[x] = top + 1
+            self._grow_stack(x)
+
+    def settle(self):
+        """
+        Drops all floating board pieces onto the blocks below them.
+
+        """
+
+        if not self._floating:
+            return
+        self.version += 1
+        height = self.height
+        for x in sorted(self._floating):
+            top = self._tops[x]
+            gap = height - self._heights[x] - 1
+            fallen = [cell for cell in self._column(x, top, gap) if cell]
+            self._write_column(
+                x, top, [0] * (gap + 1 - top - len(fallen)) + fallen)
+            self._heights[x] += len(fallen)
+            self._tops[x] = height - self._heights[x]
+            self._floating.discard(x)
+
+    def _write_column(self, x, top, values):
+        """
+        Write the cell values of column x from row top down, and update
+        the occupancy masks and pair candidates of the blocks moved there.
+
+        """
+
+        self._set_column(x, top, values)
+        width = self.width
+        self._note_changes(xrange(
+            top * width + x, (top + len(values)) * width + x, width))
+        occupancy = self._occupancy
+        bit = 1 << (x + WALL)
+        for y, cell in enumerate(values, top):
+            if cell:
+                occupancy[y] |= bit
+                self._touch(x, y)
+            else:
+                occupancy[y] &= ~bit
+
+    def _occupied(self, x, y):
+        return self._occupancy[y] >> (x + WALL) & 1
+
+    def _grow_stack(self, x):
+        """
+        Count the blocks that now rest on top of the stack of column x
+        into its height.
+
+        """
+
+        height = self._heights[x]
+        y = self.height - height - 1
+        while y >= 0 and self._occupied(x, y):
+            height += 1
+            y -= 1
+        self._heights[x] = height
+        self._check_floating(x)
+
+    def _check_floating(self, x):
+        if self._tops[x] < self.height - self._heights[x]:
+            self._floating.add(x)
+        else:
+            self._floating.discard(x)
+
+    def _column_cleared(self, x, y):
+        """
+        Update the stack and top of column x after the block at x, y
+        was removed.
+
+        """
+
+        if y >= self.height - self._heights[x]:
+            # the blocks of the stack above it now float
+            self._heights[x] = self.height - 1 - y
+        if y == self._tops[x]:
+            top = y + 1
+            while top < self.height and not self._occupied(x, top):
+                top += 1
+            self._tops[x] = top
+        self._check_floating(x)
+
+    def _filled_line(self):
+        """
+        Get the lowest row that is filled up, or None.
+
+        """
+
+        # rows above the highest block of any column have a gap
+        occupancy = self._occupancy
+        for y in xrange(self.height - 1, max(self._tops) - 1, -1):
+            if occupancy[y] == -1:
+                return y
+
+    def _placed(self, shape, location):
+        """
+        Add a merged shape to the occupancy masks, columns and pair
+        candidates.
+
+        """
+
+        self.version += 1
+        x, y = location
+        for cy, bits in enumerate(shape_mask(shape)):
+            self._occupancy[y + cy] |= bits << (x + WALL)
+        changed = []
+        for cy, row in enumerate(shape):
+            for cx, cell in enumerate(row):
+                if cell:
+                    self._touch(x + cx, y + cy)
+                    self._landed(x + cx, y + cy)
+                    changed.append((y + cy) * self.width + x + cx)
+        self._note_changes(changed)
+
+    def _landed(self, x, y):
+        """
+        Update the top and stack of column x for a new block at x, y.
+
+        """
+
+        if y < self._tops[x]:
+            self._tops[x] = y
+        if y == self.height - self._heights[x] - 1:
+            self._grow_stack(x)
+        else:
+            self._check_floating(x)
+
+    def _touch(self, x, y):
+        """
+        Note a new block at x, y. It may now pair with the blocks around it,
+        and the blocks above and left of it with it.
+
+        """
+
+        index = y * self.width + x
+        self._candidates.add(index)
+        if x > 0:
+            self._candidates.add(index - 1)
+        if y > 0:
+            self._candidates.add(index - self.width)
+
+    def _vacate(self, x, y):
+        """
+        Remove a cleared cell from the occupancy masks and its column.
+
+        """
+
+        self.version += 1
+        if self._occupied(x, y):
+            self._occupancy[y] &= ~(1 << (x + WALL))
+            self._column_cleared(x, y)
+            self._note_changes((y * self.width + x,))
+
+    def _cleared_row(self, y):
+        """
+        Empty the occupancy mask of a cleared (filled) row, and update
+        the columns.
+
+        """
+
+        self.version += 1
+        self._occupancy[y] = self._walls
+        for x in xrange(self.width):
+            self._column_cleared(x, y)
+        self._note_changes(xrange(y * self.width, (y + 1) * self.width))
+
+    def pair_blocks(self, pairs):
+        """
+        Find and remove matching blocks on the board.
+
+        pairs is a list of (new_block, (block_a, block_b)) combinations,
+        tried in the order given. Each block is paired with the neighbor
+        below it, or else the one to its right, if that neighbor is a
+        different block of the same combination. Blocks are visited left
+        to right, top to bottom.
+
+        Only blocks that were placed or fell since the last call, and their
+        neighbors above and to the left, are visited. That finds every
+        pair as long as each call is given all the combinations.
+
+        Returns the list of new_block values that were made.
+
+        """
+
+        made = []
+        block_at = self.block_at
+        candidates = self._pair_candidates(pairs)
+        for new_block, combo in pairs:
+            for x, y in candidates:
+                this_block = block_at(x, y)
+                if this_block not in combo:
+                    continue
+                for nx, ny in ((x, y + 1), (x + 1, y)):
+                    neighbor = block_at(nx, ny)
+                    if neighbor != this_block and neighbor in combo:
+                        self.clear_cell(x, y)
+                        self.clear_cell(nx, ny)
+                        made.append(new_block)
+                        break
+        return made
+
+    def _pair_candidates(self, pairs):
+        """
+        Get the (x, y) of the pair candidates in board order, leaving out
+        those whose block is in none of the combinations, and start a new
+        set of candidates.
+
+        """
+
+        width = self.width
+        block_at = self.block_at
+        pairable = set()
+        for new_block, combo in pairs:
+            pairable.update(combo)
+        candidates = []
+        for index in sorted(self._candidates):
+            y, x = divmod(index, width)
+            if block_at(x, y) in pairable:
+                candidates.append((x, y))
+        self._candidates.clear()
+        return candidates
+
+
+class ListBoard(Board):
+    """
+    A puzzle board stored as a list of rows.
+
+    """
+
+    def __init__(self, width, height):
+        super(ListBoard, self).__init__(width, height)
+        self.grid = [[0 for x in xrange(width)] for y in xrange(height)]
+
+    def block_at(self, x, y):
+        """
+        Get the block value at x, y.
+        Returns None if x, y is out of range.
+
+        """
+
+        if self.in_bounds(x, y):
+            return self.grid[y][x]
+
+    def clear_cell(self, x, y):
+        self.grid[y][x] = 0
+        self._vacate(x, y)
+
+    def rows(self):
+        """
+        Get a copy of the board as a list of rows.
+
+        """
+
+        return [row[:] for row in self.grid]
+
+    def cells(self):
+        """
+        Yields (x, y, value) for each board cell.
+
+        """
+
+        for y, row in enumerate(self.grid):
+            for x, cell in enumerate(row):
+                yield (x, y, cell)
+
+    def merged(self, shape, location):
+        """
+        Get a copy of the board rows with the shape placed at location.
+
+        """
+
+        clone = self.rows()
+        x, y = location
+        for cy, row in enumerate(shape):
+            for cx, val in enumerate(row):
+                clone[cy + y][cx + x] += val
+        return clone
+
+    def merge(self, shape, location):
+        """
+        Place the shape on the board at location.
+
+        """
+
+        x, y = location
+        for cy, row in enumerate(shape):
+            for cx, val in enumerate(row):
+                self.grid[cy + y][cx + x] += val
+        self._placed(shape, location)
+
+    def _column(self, x, top, bottom):
+        return [self.grid[y][x] for y in xrange(top, bottom)]
+
+    def _set_column(self, x, top, values):
+        grid = self.grid
+        for y, cell in enumerate(values, top):
+            grid[y][x] = cell
+
+    def clear_filled_line(self):
+        """
+        Clears the lowest filled up line.
+        Returns the row number cleared, or None.
+
+        """
+
+        y = self._filled_line()
+        if y is not None:
+            self.grid[y] = [0] * self.width
+            self._cleared_row(y)
+            return y
+
+
+class ArrayBoard(Board):
+    """
+    A puzzle board stored in a (height, width) numpy array.
+
+    Gravity moves the blocks of all floating columns at once, drop() with
+    a masked shift and settle() with a stable sort that puts the empty cells
+    on top. The occupancy masks of the rows that changed are then rebuilt
+    from the array. Pair candidates are kept in a boolean array the size of
+    the board, and only those whose block pairs with the block below or
+    right of it, looked up in a table of the combinations, are visited.
+    The lowest full row comes from a single reduction.
+
+    """
+
+    def __init__(self, width, height):
+        super(ArrayBoard, self).__init__(width, height)
+        self.grid = numpy.zeros((height, width), dtype=numpy.int16)
+        # the pair candidates, and the highest row that may have any
+        self._candidate_cells = numpy.zeros((height, width), dtype=bool)
+        self._candidate_top = height
+
+    def block_at(self, x, y):
+        if self.in_bounds(x, y):
+            return int(self.grid[y, x])
+
+    def clear_cell(self, x, y):
+        self.grid[y, x] = 0
+        self._vacate(x, y)
+
+    def rows(self):
+        return self.grid.tolist()
+
+    def blocks(self):
+        ys, xs = numpy.nonzero(self.grid)
+        return itertools.izip(
+            xs.tolist(), ys.tolist(), self.grid[ys, xs].tolist())
+
+    def cells(self):
+        for y, row in enumerate(self.grid.tolist()):
+            for x, cell in enumerate(row):
+                yield (x, y, cell)
+
+    def _shape_array(self, shape):
+        return numpy.array(shape, dtype=self.grid.dtype)
+
+    def merged(self, shape, location):
+        clone = self.grid.copy()
+        self._add_shape(clone, shape, location)
+        return clone.tolist()
+
+    def merge(self, shape, location):
+        self._add_shape(self.grid, shape, location)
+        self._placed(shape, location)
+
+    def _add_shape(self, grid, shape, location):
+        x, y = location
+        piece = self._shape_array(shape)
+        height, width = piece.shape
+        grid[y:y + height, x:x + width] += piece
+
+    def _column(self, x, top, bottom):
+        return self.grid[top:bottom, x].tolist()
+
+    def _set_column(self, x, top, values):
+        self.grid[top:top + len(values), x] = values
+
+    def clear_filled_line(self):
+        y = self._filled_line()
+        if y is not None:
+            self.grid[y] = 0
+            self._cleared_row(y)
+            return y
+
+    def _filled_line(self):
+        # rows above the highest block of any column have a gap
+        lowest = max(self._tops)
+        if lowest < self.height:
+            full = numpy.flatnonzero(self.grid[lowest:].all(axis=1))
+            if full.size:
+                return lowest + int(full[-1])
+
+    def _touch(self, x, y):
+        cells = self._candidate_cells
+        cells[y, x] = True
+        if x > 0:
+            cells[y, x - 1] = True
+        if y > 0:
+            cells[y - 1, x] = True
+        self._candidate_top = min(self._candidate_top, max(y - 1, 0))
+
+    def _touch_cells(self, ys, xs):
+        """
+        _touch() the cells at the ys, xs index arrays.
+
+        """
+
+        if not ys.size:
+            return
+        cells = self._candidate_cells
+        cells[ys, xs] = True
+        left = xs > 0
+        cells[ys[left], xs[left] - 1] = True
+        up = ys > 0
+        cells[ys[up] - 1, xs[up]] = True
+        self._candidate_top = min(self._candidate_top, max(int(ys.min()) - 1, 0))
+
+    def _refresh_occupancy(self, rows):
+        """
+        Rebuild the occupancy masks of the rows in the index array rows.
+
+        """
+
+        if not rows.size:
+            return
+        # packbits fills each byte from the high bit, so pack the rows
+        # right to left and shift off the padding at the low end.
+        padding = -self.width % 8
+        packed = numpy.packbits(self.grid[rows, ::-1] != 0, axis=1)
+        occupancy = self._occupancy
+        walls = self._walls
+        for y, row in zip(rows.tolist(), packed):
+            bits = int(binascii.hexlify(row.tostring()), 16) >> padding
+            occupancy[y] = walls | (bits << WALL)
+
+    def _gravity_slice(self):
+        """
+        Get the floating columns, and the rows from the highest floating
+        block to the lowest gap above a stack, as (columns, top, bottom).
+        Every row below bottom is part of a stack in those columns.
+
+        """
+
+        columns = sorted(self._floating)
+        top = min(self._tops[x] for x in columns)
+        bottom = self.height - min(self._heights[x] for x in columns)
+        return columns, top, bottom
+
+    def _moved(self, columns, top, old, new, touched):
+        """
+        Update the occupancy masks, pair candidates and changed cells after
+        gravity wrote the columns from row top down. The arrays are of those
+        cells, and touched marks the blocks that moved.
+
+        """
+
+        columns = numpy.array(columns)
+        rows = numpy.flatnonzero(((new != 0) != (old != 0)).any(axis=1))
+        self._refresh_occupancy(rows + top)
+        rows, n = numpy.nonzero(touched)
+        self._touch_cells(rows + top, columns[n])
+        rows, n = numpy.nonzero(new != old)
+        self._note_changes(((rows + top) * self.width + columns[n]).tolist())
+
+    def drop(self):
+        if not self._floating:
+            return
+        self.version += 1
+        height = self.height
+        columns, top, bottom = self._gravity_slice()
+        old = self.grid[top:bottom, columns]
+        # the rows of each column from its highest block down to its gap
+        rows = numpy.arange(top, bottom)[:, None]
+        tops = numpy.array([self._tops[x] for x in columns])
+        gaps = height - 1 - numpy.array([self._heights[x] for x in columns])
+        falling = (rows >= tops) & (rows <= gaps)
+        shifted = numpy.zeros_like(old)
+        shifted[1:] = old[:-1]
+        new = numpy.where(falling, shifted, old)
+        self.grid[top:bottom, columns] = new
+        taken = new != 0
+        self._moved(columns, top, old, new, taken & falling)
+        # the stacks now reach up to the highest empty cell below the gaps
+        open_rows = numpy.where(~taken & (rows <= gaps), rows, top - 1)
+        stacks = (height - 1 - open_rows.max(axis=0)).tolist()
+        for x, stack in zip(columns, stacks):
+            self._tops[x] += 1
+            self._heights[x] = stack
+            self._check_floating(x)
+
+    def settle(self):
+        if not self._floating:
+            return
+        self.version += 1
+        height = self.height
+        columns, top, bottom = self._gravity_slice()
+        old = self.grid[top:bottom, columns]
+        was_taken = old != 0
+        # a stable sort puts the empty cells on top, the blocks keep
+        # their order
+        order = numpy.argsort(was_taken, axis=0, kind='mergesort')
+        new = old[order, numpy.arange(len(columns))]
+        self.grid[top:bottom, columns] = new
+        rows = numpy.arange(top, bottom)[:, None]
+        gaps = height - 1 - numpy.array([self._heights[x] for x in columns])
+        stacks = height - bottom + was_taken.sum(axis=0)
+        fallen = (rows >= height - stacks) & (rows <= gaps)
+        self._moved(columns, top, old, new, fallen)
+        for x, stack in zip(columns, stacks.tolist()):
+            self._heights[x] = stack
+            self._tops[x] = height - stack
+        self._floating.clear()
+
+    def _pair_candidates(self, pairs):
+        top = self._candidate_top
+        if top >= self.height:
+            return []
+        ys, xs = numpy.nonzero(self._candidate_cells[top:])
+        ys += top
+        self._candidate_cells[ys, xs] = False
+        self._candidate_top = self.height
+        # table[a, b] is set if blocks a and b make a pair
+        size = max(max(combo) for new_block, combo in pairs) + 1
+        table = numpy.zeros((size, size), dtype=bool)
+        for new_block, (block_a, block_b) in pairs:
+            if block_a != block_b:
+                table[block_a, block_b] = table[block_b, block_a] = True
+        # the blocks of the candidates and their neighbors, 0 past the
+        # edges and for blocks in no combination
+        grid = self.grid
+        height, width = grid.shape
+        this = grid[ys, xs]
+        below = numpy.where(
+            ys + 1 < height, grid[numpy.minimum(ys + 1, height - 1), xs], 0)
+        right = numpy.where(
+            xs + 1 < width, grid[ys, numpy.minimum(xs + 1, width - 1)], 0)
+        this, below, right = [
+            numpy.where(blocks < size, blocks, 0)
+            for blocks in (this, below, right)]
+        pairing = table[this, below] | table[this, right]
+        return zip(xs[pairing].tolist(), ys[pairing].tolist())
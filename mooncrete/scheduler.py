@@ -0,0 +1,89 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+
+import time
+import timeit
+import trace
+from statemachine import *
+
+
+# model states where nothing animates, so we can tick slowly
+IDLE_STATES = (STATE_MENU, STATE_HELP)
+
+
+class FrameScheduler(object):
+    """
+    Paces the model engine pump.
+
+    After each tick the model calls wait(), which sleeps until the next
+    frame is due. In idle states the frames come at idle_fps instead of fps.
+
+    The sleeping is done by the wait function, which is given the seconds
+    to wait and may return early, when there is user input for example.
+
+    The duty cycle is the part of the time spent ticking instead of
+    sleeping, measured over report_interval seconds. The last measure is
+    kept in duty_cycle, and traced at INFO level.
+
+    """
+
+    def __init__(self, fps=30, idle_fps=4, wait=time.sleep,
+                idle_states=IDLE_STATES, report_interval=10):
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.idle_states = idle_states
+        self.report_interval = report_interval
+        self._wait = wait
+        self._clock = timeit.default_timer
+        # when the current frame started
+        self._frame_start = self._clock()
+        # seconds spent ticking and sleeping in the current report period
+        self._busy = 0.0
+        self._slept = 0.0
+        self._report_start = self._frame_start
+        self.duty_cycle = 0.0
+        self.idle = False
+
+    def wait(self, state=None, paused=False):
+        """
+        Sleep until the next frame is due.
+        Paused models are busy animating, they do not count as idle.
+
+        """
+
+        now = self._clock()
+        self.idle = state in self.idle_states and not paused
+        if self.idle:
+            period = 1.0 / self.idle_fps
+        else:
+            period = 1.0 / self.fps
+        self._busy += now - self._frame_start
+        remaining = self._frame_start + period - now
+        if remaining > 0:
+            self._wait(remaining)
+        self._frame_start = self._clock()
+        self._slept += self._frame_start - now
+
+        if self._frame_start - self._report_start >= self.report_interval:
+            self._report()
+
+    def _report(self):
+        total = self._busy + self._slept
+        if total > 0:
+            self.duty_cycle = self._busy / total
+        trace.info('scheduler duty cycle %.1f%% (%s)',
+            self.duty_cycle * 100, self.idle and 'idle' or 'active')
+        self._busy = 0.0
+        self._slept = 0.0
+        self._report_start = self._frame_start
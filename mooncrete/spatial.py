@@ -0,0 +1,96 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+# Spatial hashing
+#
+# A SpatialGrid splits the arcade field into square cells and remembers
+# which items are in each cell. Range queries then only look at the cells
+# that overlap the range, instead of at every item.
+#
+# Items are stored by an index the caller gives, usually their place in a
+# list. Queries return the indexes in increasing order, so the caller
+# visits the items in the same order a walk over the list would.
+
+
+import itertools
+
+
+class SpatialGrid(object):
+    """
+    A uniform grid of cell_size square cells holding item indexes.
+
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        # {(cell x, cell y): [index, ...]}
+        self._cells = {}
+
+    def __len__(self):
+        return sum(len(cell) for cell in self._cells.values())
+
+    def clear(self):
+        self._cells = {}
+
+    def insert(self, index, x, y):
+        """
+        Put the item index at x, y in the grid.
+
+        """
+
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        cell = self._cells.get(key, None)
+        if cell is None:
+            self._cells[key] = [index]
+        else:
+            cell.append(index)
+
+    def fill(self, xs, ys, top):
+        """
+        Put the items of the xs and ys integer coordinate lists that are
+        below top, with y > top, in the grid by their index in the lists.
+
+        """
+
+        size = self.cell_size
+        cells = self._cells
+        for index, x, y in itertools.izip(itertools.count(), xs, ys):
+            if y > top:
+                key = (x // size, y // size)
+                cell = cells.get(key, None)
+                if cell is None:
+                    cells[key] = [index]
+                else:
+                    cell.append(index)
+
+    def near(self, x, y, radius):
+        """
+        Get the sorted indexes in the cells within radius of x, y.
+        These may be further than radius away, test the distance to be sure.
+
+        """
+
+        size = self.cell_size
+        left = int((x - radius) // size)
+        right = int((x + radius) // size)
+        top = int((y - radius) // size)
+        bottom = int((y + radius) // size)
+        cells = self._cells
+        found = []
+        for cx in xrange(left, right + 1):
+            for cy in xrange(top, bottom + 1):
+                cell = cells.get((cx, cy), None)
+                if cell:
+                    found.extend(cell)
+        found.sort()
+        return found
@@ -0,0 +1,372 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+# Event tapes
+#
+# A TapeRecorder listens to every posted event and writes it, with a time
+# stamp and the state of the game objects it carries, to a tape file.
+# It also records the model values the view reads directly (state, score,
+# the puzzle board...) whenever they change.
+#
+# A TapePlayer reads a tape back and posts the events again, with a
+# TapeModel standing in for MoonModel. This lets the view be run and
+# profiled against a fixed workload without the game logic:
+#
+#   python -m mooncrete.tape record level9.tape
+#   python -m mooncrete.tape play level9.tape
+#
+# Each tape record is a marshalled (time, kind, payload) tuple, where kind
+# is an event class name or one of the MODEL_RECORD / BOARD_RECORD names.
+# Marshal is compact and fast, but its format belongs to the python version,
+# so play tapes with the same python that recorded them.
+
+
+import sys
+import time
+import array
+import marshal
+import timeit
+import helper
+import model
+import eventmanager
+from eventmanager import *
+
+
+TAPE_MAGIC = 'mooncrete tape'
+TAPE_VERSION = 3
+
+# record kinds that are not event class names
+MODEL_RECORD = '@model'
+BOARD_RECORD = '@board'
+
+# the model attributes the view reads, recorded in this order
+MODEL_FIELDS = (
+    'state',
+    'isplaying',
+    'level',
+    'score',
+    'asteroids_destroyed',
+    'moonbases_built',
+    'moonbases_destroyed',
+    'bonus_asteroids',
+    'bonus_base',
+    'bonus_base_destroyed',
+    'puzzle_size',
+    'arcade_size',
+    )
+
+# events that remove the game object they carry
+DESTROY_EVENTS = (
+    MooncreteDestroyEvent,
+    BuildingDestroyEvent,
+    TurretDestroyEvent,
+    RadarDestroyEvent,
+    AsteroidDestroyEvent,
+    MissileDestroyEvent,
+    ExplosionDestroyEvent,
+    )
+
+
+def _encode(value):
+    """
+    Convert an event field to something marshal can store.
+    Game objects become their state, arrays become their bytes.
+
+    """
+
+    if isinstance(value, array.array):
+        return ('#a', value.typecode, value.tostring())
+    if hasattr(value, 'position'):
+        return ('#o',
+                type(value).__name__,
+                value.id,
+                value.position,
+                getattr(value, 'destination', None),
+                getattr(value, 'radius', None),
+                getattr(value, 'charge', None),
+                getattr(value, 'max_charge', None))
+    return value
+
+
+class TapeObject(object):
+    """
+    Stands in for a game object during playback.
+
+    """
+
+    def __init__(self, kind, id):
+        self.kind = kind
+        self.id = id
+        self.position = None
+        self.destination = None
+        self.radius = None
+        self.charge = None
+        self.max_charge = None
+
+    @property
+    def ready(self):
+        return self.charge == self.max_charge
+
+    @property
+    def x(self):
+        return self.position[0]
+
+    @property
+    def y(self):
+        return self.position[1]
+
+
+class TapeRecorder(object):
+    """
+    Records posted events to a tape file.
+
+    """
+
+    def __init__(self, eventmanager, model, filename):
+        self.evman = eventmanager
+        self.model = model
+        self.stream = open(filename, 'wb')
+        marshal.dump((TAPE_MAGIC, TAPE_VERSION, marshal.version), self.stream)
+        self.started = timeit.default_timer()
+        self._last_model = None
+        self._last_board = None
+        self._last_puzzle = (None, ())
+        self.evman.RegisterListener(self)
+
+    def notify(self, event):
+        if not self.stream:
+            return
+        now = timeit.default_timer() - self.started
+        self._record_model(now)
+        if type(event) is TickEvent:
+            self._record_board(now)
+        payload = tuple(_encode(getattr(event, slot)) for slot in event.__slots__)
+        marshal.dump((now, type(event).__name__, payload), self.stream)
+        if type(event) is QuitEvent:
+            self.close()
+
+    def _record_model(self, now):
+        values = tuple(getattr(self.model, field) for field in MODEL_FIELDS)
+        if values != self._last_model:
+            self._last_model = values
+            marshal.dump((now, MODEL_RECORD, values), self.stream)
+
+    def _record_board(self, now):
+        # only read the board again when its puzzle version changes
+        version, board = self._last_puzzle
+        if version != self.model.puzzle_version:
+            version = self.model.puzzle_version
+            board = ()
+            if self.model.puzzle_board:
+                board = tuple(self.model.puzzle_board_data())
+            self._last_puzzle = (version, board)
+        turrets = tuple(
+            (turret.id, turret.charge) for turret in self.model.turrets)
+        values = (board, turrets)
+        if values != self._last_board:
+            self._last_board = values
+            marshal.dump((now, BOARD_RECORD, values), self.stream)
+
+    def close(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+            self.evman.UnregisterListener(self)
+
+
+class TapeModel(object):
+    """
+    Gives the view the model values recorded on a tape.
+
+    """
+
+    def __init__(self):
+        for field in MODEL_FIELDS:
+            setattr(self, field, None)
+        self.paused = False
+        self.board = ()
+        self.puzzle_version = 0
+        # (kind, id): TapeObject
+        self.objects = {}
+
+    def puzzle_board_data(self, include_player_shape=True, include_empty=True):
+        if include_empty:
+            return iter(self.board)
+        return (cell for cell in self.board if cell[2])
+
+    def puzzle_changes(self, since_version):
+        # tapes only hold whole boards
+        return None
+
+    def closest_ready_turret(self, arcade_position):
+        arcade_height = self.arcade_size[1]
+        if (arcade_position[1] >= arcade_height -
+                ((model.BASE_HEIGHT + 4) * model.BLOCK_PADDING)):
+            return
+        chosen_one = None
+        chosen_dist = arcade_height
+        for (kind, key), base in self.objects.items():
+            if kind == 'Turret' and base.ready:
+                distance = helper.distance(* arcade_position + base.position)
+                if distance < chosen_dist:
+                    chosen_dist = distance
+                    chosen_one = base
+        return chosen_one
+
+
+class TapePlayer(object):
+    """
+    Posts the events of a tape file, updating a TapeModel as it goes.
+
+    """
+
+    def __init__(self, eventmanager, filename, model=None):
+        self.evman = eventmanager
+        self.model = model or TapeModel()
+        self.stream = open(filename, 'rb')
+        magic, version, marshal_version = marshal.load(self.stream)
+        if magic != TAPE_MAGIC or version != TAPE_VERSION:
+            raise ValueError('%s is not a version %s mooncrete tape' %
+                (filename, TAPE_VERSION))
+        self.events_played = 0
+        self.ticks_played = 0
+
+    def _decode(self, value):
+        if type(value) is tuple and value and value[0] == '#o':
+            tag, kind, key, position, destination, radius, charge, max_charge = value
+            thing = self.model.objects.get((kind, key), None)
+            if thing is None:
+                thing = TapeObject(kind, key)
+                self.model.objects[(kind, key)] = thing
+            thing.position = position
+            thing.destination = destination
+            thing.radius = radius
+            thing.charge = charge
+            thing.max_charge = max_charge
+            return thing
+        if type(value) is tuple and value and value[0] == '#a':
+            return array.array(value[1], value[2])
+        return value
+
+    def records(self):
+        """
+        Yields the (time, kind, payload) records of the tape.
+
+        """
+
+        while True:
+            try:
+                yield marshal.load(self.stream)
+            except EOFError:
+                return
+
+    def step(self, record):
+        """
+        Play a single tape record.
+
+        """
+
+        now, kind, payload = record
+        if kind == MODEL_RECORD:
+            for field, value in zip(MODEL_FIELDS, payload):
+                setattr(self.model, field, value)
+        elif kind == BOARD_RECORD:
+            board, turrets = payload
+            if board != self.model.board:
+                self.model.board = board
+                self.model.puzzle_version += 1
+            for key, charge in turrets:
+                turret = self.model.objects.get(('Turret', key), None)
+                if turret:
+                    turret.charge = charge
+        else:
+            event_class = getattr(eventmanager, kind)
+            event = event_class(*[self._decode(value) for value in payload])
+            if event_class is TickEvent:
+                self.ticks_played += 1
+            self.events_played += 1
+            self.evman.Post(event)
+            if event_class in DESTROY_EVENTS:
+                thing = payload[0]
+                self.model.objects.pop((thing[1], thing[2]), None)
+            elif event_class is LunarLandscapeClearedEvent:
+                self.model.objects = {}
+
+    def play(self, realtime=False, on_tick=None):
+        """
+        Play the whole tape. With realtime the original timing is kept,
+        otherwise records are played as fast as possible.
+        on_tick() is called after each TickEvent.
+
+        """
+
+        started = timeit.default_timer()
+        for record in self.records():
+            if realtime:
+                wait = record[0] - (timeit.default_timer() - started)
+                if wait > 0:
+                    time.sleep(wait)
+            self.step(record)
+            if on_tick and record[1] == TickEvent.__name__:
+                on_tick()
+        self.stream.close()
+
+
+def record(filename):
+    """
+    Play the game while recording to a tape.
+
+    """
+
+    import view
+    import controller
+    evman = EventManager()
+    engine = model.MoonModel(evman)
+    graphics = view.MoonView(evman, engine)
+    kbinput = controller.MoonController(evman, engine, graphics)
+    recorder = TapeRecorder(evman, engine, filename)
+    engine.run()
+    recorder.close()
+
+
+def play(filename, realtime=False):
+    """
+    Play a tape through the view and report the time spent per frame.
+
+    """
+
+    import pygame
+    import view
+    if not realtime:
+        # do not let the view limit the frame rate
+        view.FPS = 0
+    evman = EventManager()
+    player = TapePlayer(evman, filename)
+    graphics = view.MoonView(evman, player.model)
+    started = timeit.default_timer()
+    player.play(realtime, on_tick=pygame.event.pump)
+    elapsed = timeit.default_timer() - started
+    frames = max(player.ticks_played, 1)
+    print('%d events, %d frames in %.2f s: %.3f ms/frame, %.1f frames/s' % (
+        player.events_played, player.ticks_played, elapsed,
+        elapsed * 1000 / frames, frames / elapsed))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] not in ('record', 'play', 'realtime'):
+        print('usage: python -m mooncrete.tape record|play|realtime FILENAME')
+        sys.exit(1)
+    if sys.argv[1] == 'record':
+        record(sys.argv[2])
+    else:
+        play(sys.argv[2], realtime=sys.argv[1] == 'realtime')
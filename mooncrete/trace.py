@@ -11,13 +11,239 @@
 #  You should have received a copy of the GNU General Public License
 #  along with this program. If not, see http://www.gnu.org/licenses/.
 
+# A levelled trace logger that never blocks the game loop on I/O.
+#
+# Messages are formatted only when their level is enabled:
+#
+#   trace.debug('moved %s to %s', thing, position)
+#
+# and appended to a queue. A background writer thread empties the queue
+# to the console and, if configured, a rotating log file:
+#
+#   trace.configure(filename='mooncrete.log')
+#
+# The queue is a collections.deque, its append() and popleft() are atomic
+# so the game loop never waits on a lock to trace.
+#
+# LEVEL is INFO by default. Posted events and the puzzle grid are traced
+# at DEBUG, run with --trace-level debug to see them.
+
+
+import os
+import sys
+import time
+import atexit
+import threading
+import collections
 
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {
+    DEBUG: 'DEBUG',
+    INFO: 'INFO',
+    WARNING: 'WARNING',
+    ERROR: 'ERROR',
+    }
+
+# master switch, nothing is traced while False
 TRACE = True
 
+# messages below this level are ignored
+LEVEL = INFO
+
+# seconds the writer thread sleeps between emptying the queue
+FLUSH_INTERVAL = 0.1
+
+# pending (time, level, text) messages
+_queue = collections.deque()
+_sinks = []
+_writer = None
+# only held by threads writing to the sinks, never by the game loop
+_flush_lock = threading.Lock()
+
+
+class ConsoleSink(object):
+    """
+    Writes messages to standard output.
+
+    """
+
+    def write(self, created, level, text):
+        sys.stdout.write('* %s\n' % (text,))
+
+    def flush(self):
+        sys.stdout.flush()
+
+    def close(self):
+        self.flush()
+
+
+class RotatingFileSink(object):
+    """
+    Writes time stamped messages to a file. When the file grows past
+    max_bytes it is renamed to filename.1 (the previous .1 to .2 and so on)
+    keeping backup_count old files, and a new file is started.
+
+    """
+
+    def __init__(self, filename, max_bytes=1048576, backup_count=3):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.stream = open(filename, 'a')
+        self.stream.seek(0, os.SEEK_END)
+        self.size = self.stream.tell()
+
+    def write(self, created, level, text):
+        line = '%s.%03d %-7s %s\n' % (
+            time.strftime('%H:%M:%S', time.localtime(created)),
+            int(created * 1000) % 1000,
+            LEVEL_NAMES.get(level, level),
+            text)
+        if self.size + len(line) > self.max_bytes:
+            self.rotate()
+        self.stream.write(line)
+        self.size += len(line)
+
+    def rotate(self):
+        self.stream.close()
+        for n in xrange(self.backup_count - 1, 0, -1):
+            source = '%s.%d' % (self.filename, n)
+            if os.path.exists(source):
+                os.rename(source, '%s.%d' % (self.filename, n + 1))
+        if self.backup_count > 0:
+            os.rename(self.filename, self.filename + '.1')
+        self.stream = open(self.filename, 'w')
+        self.size = 0
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.close()
+
+
+class _Writer(threading.Thread):
+    """
+    Empties the message queue to the sinks in the background.
+
+    """
+
+    def __init__(self):
+        super(_Writer, self).__init__(name='trace writer')
+        self.daemon = True
+        self.running = True
+
+    def run(self):
+        while self.running:
+            time.sleep(FLUSH_INTERVAL)
+            flush()
+
+
+def configure(console=True, filename=None, max_bytes=1048576, backup_count=3):
+    """
+    Choose where messages are written to.
+
+    """
+
+    global _sinks
+    old_sinks = _sinks
+    sinks = []
+    if console:
+        sinks.append(ConsoleSink())
+    if filename:
+        sinks.append(RotatingFileSink(filename, max_bytes, backup_count))
+    flush()
+    _sinks = sinks
+    for sink in old_sinks:
+        sink.close()
+
+
+def enabled(level=INFO):
+    """
+    Test if messages of the given level are traced.
+    Use it to skip building expensive messages.
+
+    """
+
+    return TRACE and level >= LEVEL
+
+
+def log(level, text, *args):
+    """
+    Queue a message for writing if the level is enabled.
+    The text is formatted with args only in that case.
+
+    """
+
+    if not (TRACE and level >= LEVEL):
+        return
+    if type(text) is list:
+        text = str.join('* ', text)
+    elif args:
+        text = text % args
+    if len(text) > 0:
+        _queue.append((time.time(), level, text))
+        if _writer is None:
+            _start()
+
+
+def write(text, *args):
+    log(INFO, text, *args)
+
+
+def debug(text, *args):
+    log(DEBUG, text, *args)
+
+
+def info(text, *args):
+    log(INFO, text, *args)
+
+
+def warning(text, *args):
+    log(WARNING, text, *args)
+
+
+def error(text, *args):
+    log(ERROR, text, *args)
+
+
+def flush():
+    """
+    Write all queued messages to the sinks now.
+
+    """
+
+    with _flush_lock:
+        sinks = _sinks
+        written = False
+        while _queue:
+            created, level, text = _queue.popleft()
+            for sink in sinks:
+                sink.write(created, level, text)
+            written = True
+        if written:
+            for sink in sinks:
+                sink.flush()
+
+
+def _start():
+    global _writer
+    _writer = _Writer()
+    _writer.start()
+
+
+def _shutdown():
+    if _writer:
+        # let the writer finish its sleep before the interpreter goes away
+        _writer.running = False
+        _writer.join()
+    flush()
+
 
-def write(text):
-    if TRACE:
-        if type(text) is list:
-            text = str.join('* ', text)
-        if len(text) > 0:
-            print('* %s' % (text, ))
+_sinks.append(ConsoleSink())
+atexit.register(_shutdown)
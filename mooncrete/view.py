@@ -30,6 +30,10 @@ from sprites import *
 # Limit drawing to this many frames per second.
 FPS = 30
 
+# The timer event that ends a wait_for_input() sleep. The controller has
+# USEREVENT + 0 for its menu ticks.
+WAIT_DEADLINE_EVENT = pygame.USEREVENT + 1
+
 # The region on the screen where all our drawing happens.
 # This is our window size, or resolution in full-screen.
 DRAW_AREA = pygame.Rect(0, 0, 800, 600)
@@ -65,7 +69,8 @@ PUZZLE_POS.topleft = (
     DRAW_AREA.height - PUZZLE_POS.height)
 
 # The size of a puzzle block is in ratio to the puzzle view size
-# to the model puzzle size.
+# to the model puzzle size. Sprites are scaled to the default board size,
+# other sizes are drawn with plain colored blocks.
 PUZZLE_BLOCK_SIZE = (
     PUZZLE_POS.width / model.PUZZLE_WIDTH,
     PUZZLE_POS.height / model.PUZZLE_HEIGHT)
@@ -74,7 +79,8 @@ PUZZLE_BLOCK_SIZE = (
 ARCADE_POS = DRAW_AREA.copy()
 
 # The size of an arcade sprite is in ratio to the arcade view size
-# to the model arcade size.
+# to the default model arcade size. Other arcade sizes, like the swarm
+# stress mode, are drawn scaled with sprites of this same size.
 ARCADE_SPRITE_SIZE = (
     ARCADE_POS.width // (model.ARCADE_WIDTH / model.BLOCK_PADDING),
     ARCADE_POS.height // (model.ARCADE_HEIGHT / model.BLOCK_PADDING))
@@ -105,7 +111,6 @@ class MoonView(object):
 
     def __init__(self, eventmanager, model):
         self.evman = eventmanager
-        self.evman.RegisterListener(self)
         self.model = model
         self.isinitialized = False
         self.fullscreen = False
@@ -138,139 +143,175 @@ class MoonView(object):
         self.time_left = None
         # a counter for seconds passed while on the main menu.
         self.menu_ticker = 0
+        # frame rate limit, 0 leaves the pacing to the model scheduler.
+        self.fps = FPS
+        # the model puzzle_version drawn on the puzzle panel
+        self.puzzle_version = None
+        # the event handlers of this view, by event class
+        handlers = (
+            (TickEvent, self.on_tick),
+            (InitializeEvent, self.on_initialize),
+            (ResetGameEvent, self.on_reset_game),
+            (StateEvent, self.on_state),
+            (LunarLandscapeClearedEvent, self.on_landscape_cleared),
+            (LunarLandSpawnEvent, self.on_land_spawn),
+            (MooncreteSpawnEvent, self.on_mooncrete_spawn),
+            (MooncreteDestroyEvent, self.on_mooncrete_destroy),
+            (BuildingSpawnEvent, self.on_building_spawn),
+            (BuildingDestroyEvent, self.on_building_destroy),
+            (TurretSpawnedEvent, self.on_turret_spawn),
+            (TurretDestroyEvent, self.on_turret_destroy),
+            (RadarSpawnedEvent, self.on_radar_spawn),
+            (RadarDestroyEvent, self.on_radar_destroy),
+            (AsteroidSpawnedEvent, self.on_asteroid_spawn),
+            (AsteroidMovedEvent, self.on_asteroid_moved),
+            (AsteroidDestroyEvent, self.on_asteroid_destroy),
+            (MissileSpawnedEvent, self.on_missile_spawn),
+            (MissileMovedEvent, self.on_missile_moved),
+            (MissileDestroyEvent, self.on_missile_destroy),
+            (ExplosionSpawnEvent, self.on_explosion_spawn),
+            (ExplosionGrowEvent, self.on_explosion_grow),
+            (ExplosionDestroyEvent, self.on_explosion_destroy),
+            (ArcadeFrameEvent, self.on_arcade_frame),
+            (QuitEvent, self.on_quit),
+            )
+        for event_class, handler in handlers:
+            self.evman.RegisterHandler(event_class, handler)
+
+    def on_tick(self, event):
+        self.render()
+        self.clock.tick(self.fps)
+
+    def on_initialize(self, event):
+        self.initialize()
 
-    def notify(self, event):
-        """
-        Called by an event in the message queue.
-
-        """
-
-        if isinstance(event, TickEvent):
-            self.render()
-            self.clock.tick(FPS)
-
-        elif isinstance(event, InitializeEvent):
-            self.initialize()
-
-        elif isinstance(event, ResetGameEvent):
-            self.moonbase_sprites = {}
-            self.arcade_sprites = {}
-
-        elif isinstance(event, StateEvent):
-            if event.state in (STATE_PHASE1, STATE_PHASE2):
-                self.counters = []
-                self.panels['score'].show()
-                self.panels['puzzle'].show()
-                self.panels['results'].hide()
-                self.panels['messages'].show()
-                arcade_panel = self.panels['arcade']
-                arcade_panel.scale((300, 225))
-                arcade_panel.show_position = (0, 375)
-                arcade_panel.show()
-            elif event.state in (STATE_PHASE3, STATE_REPRIEVE):
-                self.panels['score'].hide()
-                self.panels['puzzle'].hide()
-                self.panels['messages'].hide()
-                arcade_panel = self.panels['arcade']
-                arcade_panel.scale(ARCADE_POS.size)
-                arcade_panel.show_position = ARCADE_POS.topleft
-                arcade_panel.show()
-            elif event.state in (STATE_LEVELDONE, STATE_LOSE):
-                self.panels['results'].show()
-            elif event.state == STATE_HELP:
-                # TODO show the help panel
-                pass
-            elif event.state == STATE_MENU:
-                self.panels['arcade'].hide()
-                self.panels['score'].hide()
-                self.panels['puzzle'].hide()
-                self.panels['results'].hide()
-                self.panels['messages'].hide()
-
-            # display game messages
-            if event.state == STATE_PHASE1:
-                self.create_message('mix mooncrete', color.lighter_green)
-            elif event.state == STATE_PHASE2:
-                self.create_message('construct base', color.lighter_blue)
-            elif event.state == STATE_PHASE3:
-                self.create_message('alert: asteroids incoming!', color.lighter_yellow)
-            elif event.state == STATE_REPRIEVE:
-                if self.model.isplaying:
-                    self.create_message('reinforcements arrived!', color.gold)
-            elif event.state == STATE_LOSE:
-                self.create_message('moonbase destroyed!', color.lighter_red)
-            elif event.state == STATE_LEVELDONE:
-                self.create_message('level win', color.gold)
-            elif event.state == STATE_MENU:
-                self.messages = []
-
-        elif isinstance(event, LunarLandscapeClearedEvent):
-            self.clear_lunar_landscape()
-
-        elif isinstance(event, LunarLandSpawnEvent):
-            self.prerender_lunar_landscape(event.land)
-
-        elif isinstance(event, MooncreteSpawnEvent):
-            self.create_mooncrete_sprite(event.mooncrete)
-
-        elif isinstance(event, MooncreteDestroyEvent):
-            self.destroy_mooncrete_sprite(event.mooncrete)
-            self.panels['arcade'].shake(5)
-
-        elif isinstance(event, BuildingSpawnEvent):
-            self.create_building_sprite(event.building)
-
-        elif isinstance(event, BuildingDestroyEvent):
-            self.destroy_building_sprite(event.building)
-            self.panels['arcade'].shake(5)
-
-        elif isinstance(event, TurretSpawnedEvent):
-            self.create_turret_sprite(event.turret)
-
-        elif isinstance(event, TurretDestroyEvent):
-            self.destroy_turret_sprite(event.turret)
-            self.flash_screen([color.gold, color.black], 2)
-            self.panels['arcade'].shake(15)
-
-        elif isinstance(event, RadarSpawnedEvent):
-            self.create_radar_sprite(event.radar)
-
-        elif isinstance(event, RadarDestroyEvent):
-            self.destroy_radar_sprite(event.radar)
-            self.flash_screen([color.copper, color.black], 2)
-            self.panels['arcade'].shake(5)
-
-        elif isinstance(event, AsteroidSpawnedEvent):
-            self.create_asteroid_sprite(event.asteroid)
-
-        elif isinstance(event, AsteroidMovedEvent):
-            self.move_asteroid(event.asteroid)
-
-        elif isinstance(event, AsteroidDestroyEvent):
-            self.destroy_asteroid(event.asteroid)
-            self.flash_screen(color.dark_gray, 1)
-
-        elif isinstance(event, MissileSpawnedEvent):
-            self.create_missile(event.missile)
-
-        elif isinstance(event, MissileMovedEvent):
-            self.move_missile(event.missile)
-
-        elif isinstance(event, MissileDestroyEvent):
-            self.destroy_missile(event.missile)
-
-        elif isinstance(event, ExplosionSpawnEvent):
-            self.create_explosion(event.explosion)
-            self.flash_screen(color.darker_gray, 1)
-
-        elif isinstance(event, ExplosionGrowEvent):
-            self.move_explosion(event.explosion)
-
-        elif isinstance(event, ExplosionDestroyEvent):
-            self.destroy_explosion(event.explosion)
-
-        elif isinstance(event, QuitEvent):
-            self.isinitialized = False
+    def on_reset_game(self, event):
+        self.moonbase_sprites = {}
+        self.arcade_sprites = {}
+
+    def on_state(self, event):
+        """
+        Show and hide panels and display messages for the new model state.
+
+        """
+
+        if event.state in (STATE_PHASE1, STATE_PHASE2):
+            self.counters = []
+            self.panels['score'].show()
+            self.panels['puzzle'].show()
+            self.panels['results'].hide()
+            self.panels['messages'].show()
+            arcade_panel = self.panels['arcade']
+            arcade_panel.scale((300, 225))
+            arcade_panel.show_position = (0, 375)
+            arcade_panel.show()
+        elif event.state in (STATE_PHASE3, STATE_REPRIEVE):
+            self.panels['score'].hide()
+            self.panels['puzzle'].hide()
+            self.panels['messages'].hide()
+            arcade_panel = self.panels['arcade']
+            arcade_panel.scale(ARCADE_POS.size)
+            arcade_panel.show_position = ARCADE_POS.topleft
+            arcade_panel.show()
+        elif event.state in (STATE_LEVELDONE, STATE_LOSE):
+            self.panels['results'].show()
+        elif event.state == STATE_HELP:
+            # TODO show the help panel
+            pass
+        elif event.state == STATE_MENU:
+            self.panels['arcade'].hide()
+            self.panels['score'].hide()
+            self.panels['puzzle'].hide()
+            self.panels['results'].hide()
+            self.panels['messages'].hide()
+
+        # display game messages
+        if event.state == STATE_PHASE1:
+            self.create_message('mix mooncrete', color.lighter_green)
+        elif event.state == STATE_PHASE2:
+            self.create_message('construct base', color.lighter_blue)
+        elif event.state == STATE_PHASE3:
+            self.create_message('alert: asteroids incoming!', color.lighter_yellow)
+        elif event.state == STATE_REPRIEVE:
+            if self.model.isplaying:
+                self.create_message('reinforcements arrived!', color.gold)
+        elif event.state == STATE_LOSE:
+            self.create_message('moonbase destroyed!', color.lighter_red)
+        elif event.state == STATE_LEVELDONE:
+            self.create_message('level win', color.gold)
+        elif event.state == STATE_MENU:
+            self.messages = []
+
+    def on_landscape_cleared(self, event):
+        self.clear_lunar_landscape()
+
+    def on_land_spawn(self, event):
+        self.prerender_lunar_landscape(event.land)
+
+    def on_mooncrete_spawn(self, event):
+        self.create_mooncrete_sprite(event.mooncrete)
+
+    def on_mooncrete_destroy(self, event):
+        self.destroy_mooncrete_sprite(event.mooncrete)
+        self.panels['arcade'].shake(5)
+
+    def on_building_spawn(self, event):
+        self.create_building_sprite(event.building)
+
+    def on_building_destroy(self, event):
+        self.destroy_building_sprite(event.building)
+        self.panels['arcade'].shake(5)
+
+    def on_turret_spawn(self, event):
+        self.create_turret_sprite(event.turret)
+
+    def on_turret_destroy(self, event):
+        self.destroy_turret_sprite(event.turret)
+        self.flash_screen([color.gold, color.black], 2)
+        self.panels['arcade'].shake(15)
+
+    def on_radar_spawn(self, event):
+        self.create_radar_sprite(event.radar)
+
+    def on_radar_destroy(self, event):
+        self.destroy_radar_sprite(event.radar)
+        self.flash_screen([color.copper, color.black], 2)
+        self.panels['arcade'].shake(5)
+
+    def on_asteroid_spawn(self, event):
+        self.create_asteroid_sprite(event.asteroid)
+
+    def on_asteroid_moved(self, event):
+        self.move_asteroid(event.asteroid)
+
+    def on_asteroid_destroy(self, event):
+        self.destroy_asteroid(event.asteroid)
+        self.flash_screen(color.dark_gray, 1)
+
+    def on_missile_spawn(self, event):
+        self.create_missile(event.missile)
+
+    def on_missile_moved(self, event):
+        self.move_missile(event.missile)
+
+    def on_missile_destroy(self, event):
+        self.destroy_missile(event.missile)
+
+    def on_explosion_spawn(self, event):
+        self.create_explosion(event.explosion)
+        self.flash_screen(color.darker_gray, 1)
+
+    def on_explosion_grow(self, event):
+        self.move_explosion(event.explosion)
+
+    def on_explosion_destroy(self, event):
+        self.destroy_explosion(event.explosion)
+
+    def on_arcade_frame(self, event):
+        self.sync_arcade_frame(event)
+
+    def on_quit(self, event):
+        self.isinitialized = False
 
     def initialize(self):
         """
@@ -385,6 +426,7 @@ class MoonView(object):
         puzzle_panel.hide_position = DRAW_AREA.bottomright
         puzzle_panel.hide(instant=True)
         self.panels['puzzle'] = puzzle_panel
+        self.puzzle_version = None
 
         arcade_panel = Panel(ARCADE_POS.size, DRAW_AREA)
         arcade_panel.background_image = pygame.image.load(data.load('arcade_bg.png')).convert()
@@ -417,6 +459,27 @@ class MoonView(object):
         msg_panel.hide(instant=True)
         self.panels['messages'] = msg_panel
 
+    def wait_for_input(self, seconds):
+        """
+        Sleep for up to seconds, returning early when there is a
+        pygame event waiting to be handled.
+
+        """
+
+        milliseconds = int(seconds * 1000)
+        if milliseconds <= 0 or pygame.event.peek():
+            return
+        # block until an event comes in, or the deadline timer fires
+        pygame.time.set_timer(WAIT_DEADLINE_EVENT, milliseconds)
+        events = [pygame.event.wait()]
+        pygame.time.set_timer(WAIT_DEADLINE_EVENT, 0)
+        # put the events back in order for the controller, without
+        # the deadline, which may have fired after another event woke us
+        events.extend(pygame.event.get())
+        for event in events:
+            if event.type != WAIT_DEADLINE_EVENT:
+                pygame.event.post(event)
+
     def toggle_fullscreen(self):
         trace.write('toggling fullscreen')
         self.fullscreen = self.fullscreen ^ True
@@ -625,8 +688,19 @@ class MoonView(object):
 
         """
 
-        return (int(float(position[0]) / model.PUZZLE_WIDTH * PUZZLE_POS.width),
-                int(float(position[1]) / model.PUZZLE_HEIGHT * PUZZLE_POS.height))
+        width, height = self.model.puzzle_size
+        return (int(float(position[0]) / width * PUZZLE_POS.width),
+                int(float(position[1]) / height * PUZZLE_POS.height))
+
+    def puzzle_block_size(self):
+        """
+        Get the view size of a puzzle block for the model board size.
+
+        """
+
+        width, height = self.model.puzzle_size
+        return (max(1, PUZZLE_POS.width / width),
+                max(1, PUZZLE_POS.height / height))
 
     def convert_arcade_to_panel(self, position):
         """
@@ -634,8 +708,9 @@ class MoonView(object):
 
         """
 
-        return (int(float(position[0]) / model.ARCADE_WIDTH * ARCADE_POS.width),
-                int(float(position[1]) / model.ARCADE_HEIGHT * ARCADE_POS.height))
+        width, height = self.model.arcade_size
+        return (int(float(position[0]) / width * ARCADE_POS.width),
+                int(float(position[1]) / height * ARCADE_POS.height))
 
     def convert_screen_to_arcade(self, position):
         """
@@ -643,8 +718,9 @@ class MoonView(object):
 
         """
 
-        x = (model.ARCADE_WIDTH / float(DRAW_AREA.width)) * position[0]
-        y = (model.ARCADE_HEIGHT / float(DRAW_AREA.height)) * position[1]
+        width, height = self.model.arcade_size
+        x = (width / float(DRAW_AREA.width)) * position[0]
+        y = (height / float(DRAW_AREA.height)) * position[1]
         return (int(x), int(y))
 
     def convert_arcade_to_screen(self, position):
@@ -653,8 +729,9 @@ class MoonView(object):
 
         """
 
-        x = (DRAW_AREA.width / float(model.ARCADE_WIDTH)) * position[0]
-        y = (DRAW_AREA.height / float(model.ARCADE_HEIGHT)) * position[1]
+        width, height = self.model.arcade_size
+        x = (DRAW_AREA.width / float(width)) * position[0]
+        y = (DRAW_AREA.height / float(height)) * position[1]
         return (int(x), int(y))
 
     def menu_ticker_step(self):
@@ -709,14 +786,35 @@ class MoonView(object):
         self.image.blit(pix, (20, DRAW_AREA.height - 30))
 
     def draw_puzzle_blocks(self):
+        """
+        Draw the puzzle board blocks that changed since we last drew them.
+
+        """
+
+        version = self.model.puzzle_version
+        if version == self.puzzle_version:
+            return
         panel = self.panels['puzzle']
-        panel.clear()
-        for x, y, block_type in self.model.puzzle_board_data():
+        changes = self.model.puzzle_changes(self.puzzle_version)
+        self.puzzle_version = version
+        redraw = changes is None
+        if redraw:
+            panel.clear()
+            changes = self.model.puzzle_board_data(include_empty=False)
+        block_size = self.puzzle_block_size()
+        use_sprites = DRAW_SPRITES and block_size == PUZZLE_BLOCK_SIZE
+        for x, y, block_type in changes:
+            position = pygame.Rect(
+                self.convert_puzzle_to_panel((x, y)),
+                block_size)
+            if not redraw:
+                # paint over the block that was here
+                if panel.background_image:
+                    panel.image.blit(panel.background_image, position, position)
+                else:
+                    panel.image.fill(color.black, position)
             if block_type:
-                position = pygame.Rect(
-                    self.convert_puzzle_to_panel((x, y)),
-                    PUZZLE_BLOCK_SIZE)
-                if DRAW_SPRITES:
+                if use_sprites:
                     panel.image.blit(
                                     self.sprite_images[block_type],
                                     position)
@@ -1049,6 +1147,43 @@ class MoonView(object):
         if sprite:
             sprite.grow(explosion.radius * 10)
 
+    def sync_arcade_frame(self, frame):
+        """
+        Move all asteroid and missile sprites, and grow all explosion
+        sprites, from the packed arrays of an ArcadeFrameEvent.
+
+        """
+
+        sprites = self.arcade_sprites
+        arcade_width = float(self.model.arcade_size[0])
+        arcade_height = float(self.model.arcade_size[1])
+
+        # asteroids are placed in panel coordinates
+        width, height = ARCADE_POS.size
+        positions = frame.asteroid_positions
+        for n, key in enumerate(frame.asteroid_ids):
+            sprite = sprites.get(key, None)
+            if sprite:
+                sprite.rect.center = (
+                    int(positions[n * 2] / arcade_width * width),
+                    int(positions[n * 2 + 1] / arcade_height * height))
+
+        # missiles are placed in screen coordinates
+        width, height = DRAW_AREA.size
+        positions = frame.missile_positions
+        for n, key in enumerate(frame.missile_ids):
+            sprite = sprites.get(key, None)
+            if sprite:
+                sprite.rect.center = (
+                    int(width / arcade_width * positions[n * 2]),
+                    int(height / arcade_height * positions[n * 2 + 1]))
+
+        radii = frame.explosion_radii
+        for n, key in enumerate(frame.explosion_ids):
+            sprite = sprites.get(key, None)
+            if sprite:
+                sprite.grow(radii[n] * 10)
+
     def destroy_explosion(self, explosion):
         """
         Destroy an explosion sprite.
@@ -0,0 +1,95 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+
+# Tests for event dispatch, the queued mode and event pools.
+
+
+import os
+import json
+import tempfile
+import unittest
+from eventmanager import *
+
+
+class QueuedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.evman = EventManager(queued=True, queue_size=3)
+        self.handled = []
+        self.evman.RegisterHandler(
+            StateEvent, lambda event: self.handled.append(event.state))
+
+    def test_waits_for_tick(self):
+        self.evman.Post(StateEvent(1))
+        self.assertEqual(self.handled, [])
+        self.assertEqual(self.evman.pending, 1)
+        self.evman.Post(TickEvent.acquire())
+        self.assertEqual(self.handled, [1])
+
+    def test_overflow_keeps_order(self):
+        for state in xrange(2):
+            self.evman.Post(StateEvent(state))
+        self.evman.Drain()
+        # wrap around the ring, then outgrow it twice
+        for state in xrange(2, 12):
+            self.evman.Post(StateEvent(state))
+        self.assertEqual(self.handled, [0, 1])
+        self.evman.Post(TickEvent.acquire())
+        self.assertEqual(self.handled, range(12))
+        self.assertEqual(self.evman.overflow_count, 2)
+
+    def test_drain_budget(self):
+        self.evman.drain_budget = 2
+        for state in xrange(3):
+            self.evman.Post(StateEvent(state))
+        self.evman.Post(TickEvent.acquire())
+        self.assertEqual(self.handled, [0, 1])
+        self.assertEqual(self.evman.deferred_count, 1)
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def test_counts_posted_events(self):
+        evman = EventManager(queued=True)
+        evman.EnableInstrumentation()
+        evman.RegisterHandler(StateEvent, lambda event: None)
+        for state in xrange(3):
+            evman.Post(StateEvent(state))
+        report = evman.stats.report()
+        self.assertEqual(report['posted'], 3)
+        self.assertEqual(report['handled'], 0)
+        self.assertEqual(report['events']['StateEvent']['count'], 3)
+        evman.Post(TickEvent.acquire())
+        report = evman.stats.report()
+        self.assertEqual((report['posted'], report['handled']), (4, 4))
+        self.assertEqual(report['listeners']['<lambda>']['calls'], 3)
+
+    def test_dump_stats(self):
+        handle, filename = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        try:
+            evman = EventManager()
+            evman.EnableInstrumentation(filename)
+            evman.Post(StateEvent(1))
+            evman.DumpStats()
+            with open(filename) as stream:
+                self.assertEqual(json.load(stream)['posted'], 1)
+            evman.DisableInstrumentation()
+            self.assertNotIn('Post', evman.__dict__)
+        finally:
+            os.remove(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
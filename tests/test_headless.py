@@ -0,0 +1,102 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+
+# Tests for the headless driver: the bots play real rounds.
+
+
+import os
+import sys
+import json
+import random
+import tempfile
+import unittest
+from StringIO import StringIO
+import model
+import headless
+from statemachine import *
+from eventmanager import *
+
+
+def play(steps, seed=1, bots=True, **options):
+    """
+    Run a headless game. Returns the driver and the states it went through.
+
+    """
+
+    random.seed(seed)
+    evman = EventManager(**options)
+    game = model.MoonModel(evman)
+    states = []
+    evman.RegisterHandler(StateEvent, lambda event: states.append(event.state))
+    driver = headless.HeadlessDriver(evman, game, bots=bots)
+    driver.run(steps)
+    return driver, states
+
+
+class HeadlessTest(unittest.TestCase):
+
+    def test_bots_score(self):
+        driver, states = play(3000)
+        self.assertGreaterEqual(driver.games, 1)
+        self.assertGreater(driver.model.score, 0)
+        for state in (STATE_MENU, STATE_PHASE1, STATE_PHASE2, STATE_PHASE3,
+                      STATE_REPRIEVE, STATE_LEVELDONE):
+            self.assertIn(state, states)
+
+    def test_queued_dispatch(self):
+        # the model plays the same game when events wait for the next tick
+        immediate, immediate_states = play(3000)
+        queued, queued_states = play(3000, queued=True, queue_size=8)
+        self.assertEqual(queued_states, immediate_states)
+        for attribute in ('score', 'level', 'state', 'asteroids_destroyed'):
+            self.assertEqual(getattr(queued.model, attribute),
+                             getattr(immediate.model, attribute))
+        self.assertEqual(queued.games, immediate.games)
+        self.assertGreater(queued.evman.overflow_count, 0)
+        self.assertEqual(queued.evman.pending, 0)
+
+    def test_script(self):
+        script = headless.read_script(['# step move', '3 left', '5 rotate', '8 next'])
+        self.assertEqual(script[3], [('move_left', ())])
+        random.seed(1)
+        evman = EventManager()
+        driver = headless.HeadlessDriver(evman, model.MoonModel(evman), script, False)
+        driver.run(10)
+        self.assertEqual(driver.model.state, STATE_PHASE2)
+
+    def test_main(self):
+        # a swarm run from the command line entry, writing its stats
+        handle, filename = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            driver = headless.main(300, seed=1, swarm=True, stats=filename)
+            report = sys.stdout.getvalue()
+            with open(filename) as stream:
+                stats = json.load(stream)
+        finally:
+            sys.stdout = stdout
+            os.remove(filename)
+        self.assertEqual(driver.steps, 300)
+        self.assertIn('300 steps', report)
+        self.assertGreater(stats['events']['ArcadeFrameEvent']['count'], 0)
+
+    def test_bad_script(self):
+        self.assertRaises(ValueError, headless.read_script, ['3 jump'])
+        self.assertRaises(ValueError, headless.read_script, ['3 fire 10'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+
+# Tests for the line helpers.
+
+
+import random
+import unittest
+import helper
+
+
+class LineTest(unittest.TestCase):
+
+    def test_line_point_matches_segments(self):
+        rand = random.Random(1)
+        for count in xrange(2000):
+            start = (rand.randint(-20, 320), rand.randint(-20, 320))
+            if count % 5:
+                end = (rand.randint(-20, 320), rand.randint(-20, 320))
+            else:
+                # short lines, single points included
+                end = (start[0] + rand.randint(-3, 3), start[1] + rand.randint(-3, 3))
+            points = helper.get_line_segments(start, end)
+            walk = helper.line_walk(start, end)
+            self.assertEqual(len(points), walk[2] + 1)
+            self.assertEqual(
+                [helper.line_point(walk, n) for n in xrange(len(points))],
+                points, (start, end))
+
+
+if __name__ == '__main__':
+    unittest.main()
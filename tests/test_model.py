@@ -0,0 +1,193 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+
+# Tests for the model puzzle versions and changes, as the view reads them,
+# and for the arcade engines playing the same game.
+
+
+import os
+import random
+import unittest
+import model
+import projectiles
+from statemachine import *
+from eventmanager import *
+
+
+def puzzle_game(engine='list', gravity='stepped', size=(8, 12)):
+    """
+    Get a model playing the first puzzle phase.
+
+    """
+
+    evman = EventManager()
+    game = model.MoonModel(evman)
+    game.puzzle_engine = engine
+    game.puzzle_gravity = gravity
+    game.puzzle_size = size
+    game.new_or_continue()
+    return evman, game
+
+
+class PuzzleChangesTest(unittest.TestCase):
+
+    def test_first_frame(self):
+        # the view has not drawn any version yet
+        evman, game = puzzle_game()
+        self.assertEqual(game.state, STATE_PHASE1)
+        self.assertIsNone(game.puzzle_changes(None))
+        self.assertEqual(
+            list(game.puzzle_board_data(include_empty=False)),
+            [cell for cell in game.puzzle_board_data() if cell[2]])
+
+    def test_same_version(self):
+        evman, game = puzzle_game()
+        self.assertEqual(game.puzzle_changes(game.puzzle_version), [])
+
+    def test_future_and_old_versions(self):
+        evman, game = puzzle_game()
+        version = game.puzzle_version
+        self.assertIsNone(game.puzzle_changes(version + 1))
+        for count in xrange(model.PUZZLE_HISTORY + 2):
+            evman.Post(StepGameEvent())
+            game.puzzle_version
+        self.assertGreater(game.puzzle_version, version + model.PUZZLE_HISTORY)
+        self.assertIsNone(game.puzzle_changes(version))
+
+    def test_changes_replay_the_board(self):
+        for engine in ('list', 'array'):
+            for gravity in ('stepped', 'settle'):
+                self._replay(engine, gravity)
+
+    def _replay(self, engine, gravity):
+        random.seed(5)
+        evman, game = puzzle_game(engine, gravity)
+        snapshots = {}
+        actions = (game.move_left, game.move_right, game.rotate_puzzle,
+                   game.move_down, lambda: evman.Post(StepGameEvent()))
+        for count in xrange(1500):
+            random.choice(actions)()
+            if game.state != STATE_PHASE1:
+                game.escape_state()
+                game.new_or_continue()
+            version = game.puzzle_version
+            rows = game.puzzle_board_rows()
+            for back in (1, 2, 5):
+                old = snapshots.get(version - back, None)
+                changes = game.puzzle_changes(version - back)
+                if changes is None:
+                    continue
+                self.assertIsNotNone(old)
+                replayed = [row[:] for row in old]
+                for x, y, value in changes:
+                    replayed[y][x] = value
+                self.assertEqual(replayed, rows, (engine, gravity, count, back))
+            snapshots[version] = [row[:] for row in rows]
+
+
+class ArcadeEngineTest(unittest.TestCase):
+
+    def test_engines_agree(self):
+        if projectiles.numpy is None:
+            self.skipTest('numpy is not installed')
+        for batch in (False, True):
+            expected = self._play(projectiles.ENGINE_LIST, batch)
+            played = self._play(projectiles.ENGINE_ARRAY, batch)
+            self.assertEqual(played[:3], expected[:3])
+            self.assertEqual(len(played[3]), len(expected[3]))
+            # one event at a time, diffing whole logs takes ages
+            for n, (event, expected_event) in enumerate(zip(played[3], expected[3])):
+                self.assertEqual(event, expected_event, (batch, n))
+
+    def _play(self, engine, batch):
+        """
+        Play an arcade round with missiles and explosions thrown in.
+        Returns what the events carried.
+
+        """
+
+        random.seed(3)
+        evman = EventManager()
+        game = model.MoonModel(evman)
+        game.arcade_engine = engine
+        game.batch_arcade_events = batch
+        log = []
+        evman.RegisterListener(EventLog(log))
+        game.new_or_continue()
+        game.next_phase()
+        game.next_phase()
+        game.level = 20
+        destroyed = 0
+        for count in xrange(1500):
+            evman.Post(StepGameEvent())
+            xs, ys = game.asteroid_coordinates
+            low = [(x, y) for x, y in zip(xs, ys) if 60 < y < 200]
+            if count % 3 == 0 and low:
+                game.fire_missile((low[0][0], low[0][1] + 60))
+            if count % 25 == 0 and low:
+                game.spawn_explosion((low[-1][0], low[-1][1] + 8))
+            destroyed = max(destroyed, game.asteroids_destroyed)
+            if game.state != STATE_PHASE3:
+                break
+        self.assertGreater(destroyed, 0)
+        return count, destroyed, game.score, log
+
+
+class EventLog(object):
+    """
+    Logs what events carry, with game objects and arrays by value.
+
+    """
+
+    def __init__(self, log):
+        self.log = log
+
+    def notify(self, event):
+        values = []
+        for slot in event.__slots__:
+            value = getattr(event, slot)
+            if hasattr(value, 'position'):
+                # array handles of every kind have a radius
+                value = (value.position, getattr(value, 'radius', None) or None,
+                         getattr(value, 'destination', None))
+            elif hasattr(value, 'tolist'):
+                value = value.tolist()
+            elif type(value) is tuple:
+                # ids differ between runs
+                value = len(value)
+            values.append(value)
+        self.log.append((type(event).__name__, values))
+
+
+class PuzzleViewTest(unittest.TestCase):
+
+    def test_first_frame(self):
+        try:
+            import view
+        except ImportError:
+            self.skipTest('pygame is not installed')
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        evman, game = puzzle_game()
+        graphics = view.MoonView(evman, game)
+        evman.Post(InitializeEvent())
+        self.assertIsNone(graphics.puzzle_version)
+        graphics.draw_puzzle_blocks()
+        self.assertEqual(graphics.puzzle_version, game.puzzle_version)
+        game.move_left()
+        graphics.draw_puzzle_blocks()
+        self.assertEqual(graphics.puzzle_version, game.puzzle_version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+
+# Tests for the projectile stores.
+
+
+import random
+import unittest
+import projectiles
+from gameObjects import *
+
+
+ENGINES = (projectiles.ENGINE_LIST, projectiles.ENGINE_ARRAY)
+
+
+class IdTest(unittest.TestCase):
+
+    def test_ids_are_not_reused(self):
+        for engine in ENGINES:
+            store = projectiles.make_store(Explosion, engine)
+            seen = set()
+            for n in xrange(100):
+                thing = store.spawn((n, n))
+                self.assertNotIn(thing.id, seen)
+                seen.add(thing.id)
+                store.remove(thing)
+                # removed things keep their id
+                self.assertIn(thing.id, seen)
+
+    def test_ids_follow_slots(self):
+        for engine in ENGINES:
+            asteroids = projectiles.make_store(Asteroid, engine)
+            missiles = projectiles.make_store(Missile, engine)
+            things = [asteroids.spawn((n, 0), (n, 50)) for n in xrange(4)]
+            things.append(missiles.spawn((0, 50), (10, 10)))
+            # ids are unique across stores, the view keys them all together
+            self.assertEqual(len(set(thing.id for thing in things)), 5)
+            asteroids.remove(things[1])
+            self.assertEqual(asteroids.ids(),
+                (things[0].id, things[3].id, things[2].id))
+            self.assertEqual(missiles.ids(), (things[4].id,))
+
+
+class EngineTest(unittest.TestCase):
+
+    def test_engines_agree(self):
+        if projectiles.numpy is None:
+            self.skipTest('numpy is not installed')
+        rand = random.Random(2)
+        stores = {}
+        for engine in ENGINES:
+            stores[engine] = [projectiles.make_store(kind, engine)
+                              for kind in (Asteroid, Missile, Explosion)]
+        for step in xrange(300):
+            spawns = []
+            for n in xrange(rand.randrange(4)):
+                start = (rand.randint(0, 300), rand.randint(0, 100))
+                end = (rand.randint(0, 300), rand.randint(100, 250))
+                spawns.append((rand.randrange(3), start, end, rand.randint(1, 5)))
+            removes = [(rand.randrange(3), rand.random()) for n in xrange(rand.randrange(3))]
+            results = []
+            for engine in ENGINES:
+                for kind, start, end, speed in spawns:
+                    if kind == 2:
+                        stores[engine][kind].spawn(start)
+                    else:
+                        stores[engine][kind].spawn(start, end, speed)
+                for kind, where in removes:
+                    store = stores[engine][kind]
+                    if len(store):
+                        store.remove(store[int(where * len(store))])
+                asteroids, missiles, explosions = stores[engine]
+                results.append((
+                    list(asteroids.move()), list(missiles.move()),
+                    list(explosions.grow()),
+                    asteroids.positions(), missiles.positions(),
+                    asteroids.coordinates(), explosions.radii(),
+                    [thing.position for thing in asteroids],
+                    [thing.destination for thing in missiles]))
+            self.assertEqual(results[0], results[1], step)
+
+
+if __name__ == '__main__':
+    unittest.main()
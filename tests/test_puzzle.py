@@ -0,0 +1,81 @@
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program. If not, see http://www.gnu.org/licenses/.
+
+
+# Tests for the puzzle board engines: the array board plays the same as
+# the list board.
+
+
+import random
+import unittest
+import model
+import puzzle
+
+
+BLOCKS = (10, 11, 13, 14, 16, 17, 20, 21)
+
+
+class EngineTest(unittest.TestCase):
+
+    def test_engines_agree(self):
+        if puzzle.numpy is None:
+            self.skipTest('numpy is not installed')
+        for size in ((10, 10), (7, 15), (20, 6)):
+            self._play(size)
+
+    def _play(self, size):
+        width, height = size
+        rand = random.Random(width)
+        boards = [puzzle.make_board(width, height, engine)
+                  for engine in (puzzle.ENGINE_LIST, puzzle.ENGINE_ARRAY)]
+        for count in xrange(600):
+            shape = rand.choice(model.PIECE_CATALOGUE)
+            piece = puzzle.Piece(shape, [rand.choice(BLOCKS) for n in xrange(shape.size)])
+            rotation = rand.randrange(4)
+            turn = piece.turns[rotation]
+            location = (rand.randrange(-1, width), rand.randrange(height))
+            pairs = model.BLOCK_PAIRS.items()
+            rand.shuffle(pairs)
+            settle = rand.random() < 0.5
+            cell = (rand.randrange(width), rand.randrange(height))
+            clear = rand.random() < 0.1
+            results = []
+            for board in boards:
+                collides = board.collides(turn, location, piece.masks[rotation])
+                if not collides:
+                    board.merge(turn, location)
+                made = board.pair_blocks(pairs)
+                if settle:
+                    board.settle()
+                else:
+                    board.drop()
+                line = board.clear_filled_line()
+                if clear:
+                    board.clear_cell(*cell)
+                results.append((collides, made, line, board.rows()))
+                self._check_masks(board)
+            self.assertEqual(results[0], results[1], (size, count))
+
+    def _check_masks(self, board):
+        rows = board.rows()
+        occupancy = board.occupancy()
+        for y, row in enumerate(rows):
+            bits = sum(1 << x for x, cell in enumerate(row) if cell)
+            self.assertEqual(
+                (occupancy[y] >> puzzle.WALL) & ((1 << board.width) - 1), bits)
+        self.assertEqual(list(board.blocks()),
+                         [cell for cell in board.cells() if cell[2]])
+
+
+if __name__ == '__main__':
+    unittest.main()